@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+import re
+
+
+class AxisResolver:
+    """Resolves the axes of the KUBA structures to the traffic axes of the
+    traffic bulletin.
+
+    The axes of a whole column are resolved in one vectorized pass over the
+    distinct axes of the column:
+      1. The axes are normalised (non-breaking spaces and repeated spaces
+         are replaced by a single space, surrounding spaces are removed).
+      2. The normalised axis is looked up in the explicit mapping (whose
+         keys are normalised the same way).
+      3. Axes that are not in the mapping are resolved with the rules below,
+         e.g. "N03-" → "A 3", "N 4+" → "A 4" or "H01" → "H 1". An axis is
+         only resolved by the rules if the traffic axis exists in the
+         bulletin.
+
+    The result is a categorical column of traffic axes with missing values
+    for the unmapped axes. These and the axes resolved to traffic axes
+    without data fall back to the default traffic (see TrafficTable) and are
+    listed by get_unmapped().
+    """
+
+    # increase when the rules change
+    VERSION = 1
+
+    WHITESPACE = re.compile(r'\s+')
+
+    # the road class ("N" or "A" for national roads, "H" for main roads),
+    # the number (with or without leading zeros) and an optional variant
+    # letter (e.g. "N1H"), everything after it (directions like "+", "-" or
+    # "=", names of sections, ...) is ignored
+    AXIS_PATTERN = re.compile(
+        r'^(?P<road>[NAH])\s?0*(?P<number>[1-9][0-9]*)'
+        r'(?P<variant>[A-Za-z]?)(?![0-9A-Za-z])')
+    ROADS = {'N': 'A', 'A': 'A', 'H': 'H'}
+
+    def __init__(self, mapping: dict, traffic_axes) -> None:
+        """Initialize the AxisResolver.
+
+        Parameters
+        ----------
+        mapping : dict
+            The explicit mapping of KUBA axes to traffic axes
+        traffic_axes : iterable
+            All traffic axes of the bulletin
+        """
+        self.mapping = {AxisResolver.normalise(axis): traffic_axis
+                        for axis, traffic_axis in mapping.items()}
+        self.traffic_axes = set(traffic_axes)
+
+    @staticmethod
+    def normalise(axis: str) -> str:
+        """Returns the normalised form of an axis.
+
+        Parameters
+        ----------
+        axis : str
+            The axis (e.g. "N13+\\xa0und\\xa0N13-")
+
+        Returns
+        -------
+        str
+            The normalised axis (e.g. "N13+ und N13-")
+        """
+        return AxisResolver.WHITESPACE.sub(' ', axis).strip()
+
+    def resolve(self, axes: pd.Series) -> pd.Series:
+        """Resolves a column of KUBA axes.
+
+        Parameters
+        ----------
+        axes : pandas.Series
+            The KUBA axes
+
+        Returns
+        -------
+        pandas.Series
+            The categorical traffic axes (with the index of the KUBA axes,
+            missing values for unmapped axes)
+        """
+        kuba_axes = axes.astype('category')
+        categories = pd.Series(
+            kuba_axes.cat.categories.astype(str), dtype=object)
+
+        normalised = categories.str.replace(
+            AxisResolver.WHITESPACE, ' ', regex=True).str.strip()
+        mapped = normalised.map(self.mapping)
+        ruled = self.__apply_rules(normalised)
+        traffic_axes = mapped.where(mapped.notna(), ruled)
+
+        # every KUBA axis gets the traffic axis of its category, missing
+        # KUBA axes (code -1) get the appended missing traffic axis
+        resolved = pd.Categorical(traffic_axes.to_numpy(dtype=object))
+        codes = np.append(resolved.codes, -1)[kuba_axes.cat.codes]
+        return pd.Series(
+            pd.Categorical.from_codes(codes, resolved.categories),
+            index=axes.index)
+
+    @staticmethod
+    def get_unmapped(axes: pd.Series, traffic_axes: pd.Series,
+                     axes_with_data) -> pd.Series:
+        """Returns the KUBA axes without traffic data.
+
+        These are the axes that could not be resolved and the axes that were
+        resolved to a traffic axis without (complete) data in the bulletin
+        (e.g. "A21" → "A 21", which is not in the bulletin).
+
+        Parameters
+        ----------
+        axes : pandas.Series
+            The KUBA axes
+        traffic_axes : pandas.Series
+            The resolved traffic axes (see resolve())
+        axes_with_data : iterable
+            The traffic axes with complete data (see TrafficTable)
+
+        Returns
+        -------
+        pandas.Series
+            The number of structures of every KUBA axis (missing axes
+            included) and its traffic axis (missing if unmapped), most
+            frequent first
+        """
+        traffic_axes = traffic_axes.astype(object)
+        without_data = ~traffic_axes.isin(set(axes_with_data)).to_numpy()
+        structures = pd.DataFrame({
+            'axis': axes.astype(object).to_numpy()[without_data],
+            'traffic_axis': traffic_axes.to_numpy()[without_data]})
+        return structures.value_counts(dropna=False).rename('count')
+
+    def __apply_rules(self, axes):
+        parts = axes.str.extract(AxisResolver.AXIS_PATTERN).astype(object)
+        prefixes = parts['road'].map(AxisResolver.ROADS).astype(object) + (
+            ' ') + parts['number']
+        # the axis with its variant (e.g. "A 1H") if the bulletin has it,
+        # otherwise the axis itself (e.g. "A 9" for "N9S")
+        variants = prefixes + parts['variant'].fillna('')
+        return variants.where(
+            variants.isin(self.traffic_axes),
+            prefixes.where(prefixes.isin(self.traffic_axes)))
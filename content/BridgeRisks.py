@@ -1,432 +1,396 @@
-import math
+import numpy as np
+import pandas as pd
+import Labels
 from datetime import datetime
 CURRENT_YEAR = datetime.now().year
 
 
 class BridgeRisks:
+    """Calculates the factors and the probabilities of collapse of bridges.
+
+    All factors are calculated column-wise for all bridges at once: years,
+    ages, spans and condition classes are assigned to the bins of the tables
+    with numpy.searchsorted(), type and material codes are looked up in
+    arrays indexed by the code and the names are searched with vectorized
+    string methods.
+    """
+
+    # factor K_1 ("Faktor für menschliche Fehler"): the factor of the years
+    # before the first year, between the years and after the last year
+    HUMAN_ERROR_YEARS = [1967, 1973, 1979, 1985, 2003]
+    HUMAN_ERROR_FACTORS = [9, 6, 4, 2, 1, 0.5]
+
+    # factor K_3 ("statische Bestimmtheit"), unknown for all other types
+    STATICAL_DETERMINACY_FACTORS = {
+        # "Brücke mit Einfeldträger"
+        1111: 1,
+        # "Brücke mit Durchlaufträger"
+        1112: 0.014,
+        # "Brücke mit Gerberträger"
+        1113: 1}
+
+    # factor P_f * K_4 ("Zustandsklasse")
+    # see table 3.23 ("Festlegung H1"): the factor of the condition classes
+    # below 3, 4, 5 and of all other (and unknown) condition classes
+    CONDITION_CLASSES = [3, 4, 5]
+    CONDITION_FACTORS_H1 = [1e-6, 3e-6, 1e-5, 3e-5]
+    # see table 3.24 ("Festlegung H2"): the factor of the ages up to 1, 2, 5,
+    # ... years and of all older bridges (also used if the age is unknown or
+    # the year of construction is in the future)
+    AGES = [1, 2, 5, 10, 15, 20, 30, 40, 50, 60, 70, 80, 90]
+    CONDITION_FACTORS_H2 = [1.128e-6, 2.112e-6, 5.067e-6, 9.712e-6, 1.612e-5,
+                            2.066e-5, 3.148e-5, 4.025e-5, 5.102e-5, 6.079e-5,
+                            7.235e-5, 8.117e-5, 9.095e-5, 1.019e-4]
+
+    # factor K_6 ("Berücksichtigung der Überführung"), the highest factor is
+    # used for unknown overpass situations
+    OVERPASS_FACTORS = {
+        'Überquert anderes Infrastrukturobjekt': 5,
+        'Überquert Bahnanlage': 5,
+        'Überquert Strasse / Weg': 5,
+        'Überquert übrige Infrastruktur': 5,
+        'Überquert Verkehrsweg': 5,
+        'Überquert anderes': 5,
+        'Überquert Fluss': 8.7,
+        'Überquert Gewässer': 8.7,
+        'Überquert Kanal': 8.7,
+        'Überquert Natur': 1,
+        'Überquert Leitungen': 1}
+    DEFAULT_OVERPASS_FACTOR = 8.7
+
+    # factor K_7 ("Statische Berechnung"): H3 of the spans below 6, 12, 18
+    # and of all larger spans
+    SPANS = [6, 12, 18]
+    STATIC_CALCULATION_FACTORS_H3 = [0.0023, 0.0047, 0.0291, 0.0238]
+    # if the span, the largest span and the length are unknown
+    DEFAULT_SPAN = 25
+
+    # factor K_8 ("Brückentyp"), the type in the table and (in the comment
+    # above) in the document
+    BRIDGE_TYPE_FACTORS = {
+        # "Plattenbalken"
+        1193: 0.5,  # "Plattenbrücke"
+        # "Balkenbrücke"
+        1111: 1,  # "Brücke mit Einfeldträger"
+        1112: 1,  # "Brücke mit Durchlaufträger"
+        1113: 1,  # "Brücke mit Gerberträger"
+        # "Bogen"
+        1123: 2,  # "Brücke mit Bogentragwerk"
+        1124: 2,  # "Brücke mit versteiftem Stabbogen / Langerscher Balken"
+        11: 2,  # "Brücke, Viadukt"
+        1125: 2,  # "Gewölbekonstruktion"
+        112: 2,  # "Rahmen-, Bogenbrücken"
+        # "Andere"
+        1192: 3,  # "Brücke auf Wanne"
+        1131: 3,  # "Schrägseilbrücke"
+        191: 3,  # "Brückenanlage"
+        1133: 3,  # "Spannbandbrücke"
+        119: 3,  # "Spezielle Brücke"
+        # "Rahmen"
+        1121: 0.5,  # "Brücke mit Rahmentragwerk"
+        1122: 0.5,  # "Brücke mit Sprengwerk"
+        # "Hängebrücke"
+        1132: 3}  # "Hängebrücke"
+    DEFAULT_BRIDGE_TYPE_FACTOR = 0.4
+
+    # factor K_9 ("Baustoff"), the material in the table and (in the comment
+    # above) in the document
+    MATERIAL_FACTORS = {
+        # "Beton"
+        1121: 1,  # "Betonkonstruktion"
+        # e.g. 6A - AK 1, BRÜCKE AK Herbizug Sisikon
+        1122: 1,  # "Verkleidete Betonkonstruktion"
+        1123: 1,  # "Stahlbetonkonstruktion"
+        1124: 1,  # "Verkleidete Stahlbetonkonstruktion"
+        1125: 1,  # "Spannbetonkonstruktion"
+        # e.g. S0161, BRÜCKE Bachhalden
+        1126: 1,  # "Spannbetonkonstruktion (ohne Verbund)"
+        # "Stahl"
+        1141: 5.67,  # "Stahlkonstruktion"
+        # "Holz/Mauerwerk"
+        117: 6.67,  # "Holzkonstruktion"
+        1111: 6.67,  # "Mauerwerk"
+        1112: 6.67,  # "Ausbetoniertes Mauerwerk"
+        # e.g. S5811, BRÜCKE Hohsteg U57
+        1114: 6.67,  # "Trockensteinmauer mit behauenen Steinen aufgebaut"
+        # "Verbund"
+        1152: 1,  # "Verbundkonstruktion"
+        1153: 1,  # "Verbundkonstruktion mit Vorspannung"
+        # "Sonstiges"
+        1133: 6.67,  # "Wellblechkonstruktion"
+        1135: 6.67,  # "Erdkonstruktion"
+        # e.g. 1.043-1, UEF FG Mühlematt Liestal
+        1161: 6.67,  # "Seilkonstruktion"
+        1162: 6.67}  # "Vorgespannte Seilkonstruktion"
+    # default value is largest value in list
+    # (also for empty fields or "Andere Bauart")
+    DEFAULT_MATERIAL_FACTOR = 6.67
+
+    # factor K_11 ("Robustheit")
+    # changed after meeting of 2024-07-22
+    # (was 5, 4.5, 3.3, 1.4, 1.2 and 1 for the years of construction before
+    # 1968, 1973, 1980, 1986, 2003 and later)
+    ROBUSTNESS_FACTOR = 1
+
+    # factor K_13 ("Erdbeben")
+    # see table 3.31 ("Faktor H 4 basierend auf Wenk, Basöz et al."):
+    #   - 1121: "Brücke mit Rahmentragwerk", 1122: "Brücke mit Sprengwerk"
+    #     simplified formula (0.25 / 0.6 == 5/12)
+    FRAME_BRIDGE_TYPES = [1121, 1122]
+    FRAME_BRIDGE_FACTOR_H4 = 5 / 12
+    #   - 1113: "Brücke mit Gerberträger", ramps (multilingual string search
+    #     in name: "Rampen") and skew > 30°
+    #     simplified formula (5 * 0.6 == 3)
+    GERBER_BRIDGE_TYPE = 1113
+    RAMP_PATTERN = 'rampe|rampa'
+    MAX_SKEW = 30
+    CRITICAL_FACTOR_H4 = 3
+    #     bridges with strange skew values get a penalty factor of 2
+    #     (e.g. N01Z34: 78031)
+    STRANGE_SKEW = 100
+    STRANGE_SKEW_PENALTY_FACTOR = 2
+    # see table 3.30 ("Erhöhungsfaktor der Einsturzwahrscheinlichkeit"):
+    # the rows are the years of construction before 1970, 1989, 2003 and
+    # later, the columns the earthquake zones
+    EARTHQUAKE_YEARS = [1970, 1989, 2003]
+    EARTHQUAKE_FACTORS = np.array([[3.0, 10.0, 15],
+                                   [1.8, 3.0, 4],
+                                   [1.1, 1.5, 2],
+                                   [1, 1, 1]])
+    EARTHQUAKE_ZONE_COLUMNS = {'Z1a': 0, 'Z1b': 0, 'Z2': 1, 'Z3a': 2,
+                               'Z3b': 2}
+    # When there are bridges outside of earthquake zones we assume zone 2.
+    DEFAULT_EARTHQUAKE_ZONE_COLUMN = 1
 
     @staticmethod
-    def getNormYear(normText):
-        if isinstance(normText, str):
-            segments = normText.split(',')
-            if len(segments) > 1:
-                year = segments[0]
-                if '/' in year:
-                    # some years are formatted like this: "1913/15"
-                    return int(year.split('/')[0])
-                else:
-                    return int(year)
-            else:
-                # text without year prefix
-                return None
-        else:
-            # empty text
-            return None
+    def calculate(bridges: pd.DataFrame,
+                  earthquake_zones: pd.Series,
+                  overpass_functions: dict,
+                  skews: dict,
+                  earthquake_checks: dict) -> pd.DataFrame:
+        """Calculates the factors and the probabilities of collapse.
+
+        Parameters
+        ----------
+        bridges : pandas.DataFrame
+            The rows of the bridges
+        earthquake_zones : pandas.Series
+            The earthquake zone of every bridge (None outside of the zones)
+        overpass_functions : dict
+            The overpass function of the bridges (by bridge number)
+        skews : dict
+            The skew of the bridges (by bridge number)
+        earthquake_checks : dict
+            The result of the earthquake check of the bridges (by bridge
+            number)
+
+        Returns
+        -------
+        pandas.DataFrame
+            The columns 'norm_year', 'age', 'span' and all factors (NaN if
+            unknown) and the column 'probability_of_collapse' (with the
+            index of the bridges)
+        """
+        numbers = bridges[Labels.NUMBER_LABEL].to_numpy(dtype=object)
+        type_codes = bridges[Labels.TYPE_CODE_LABEL].to_numpy(
+            dtype='float64')
+        years = np.trunc(bridges[Labels.YEAR_OF_CONSTRUCTION_LABEL].to_numpy(
+            dtype='float64'))
+
+        # K_1
+        # if the year of the norm generation is unknown we use the year of
+        # construction (bridges where both are unknown end up in the last
+        # bin because NaN is sorted to the end)
+        norm_years = BridgeRisks.__get_norm_years(
+            bridges[Labels.NORM_YEAR_LABEL])
+        relevant_years = np.where(
+            np.isnan(norm_years), years, norm_years)
+        human_error_factors = BridgeRisks.__get_binned(
+            relevant_years, BridgeRisks.HUMAN_ERROR_YEARS,
+            BridgeRisks.HUMAN_ERROR_FACTORS, 'right')
+
+        # K_3
+        statical_determinacy_factors = BridgeRisks.__look_up(
+            type_codes, BridgeRisks.STATICAL_DETERMINACY_FACTORS, np.nan)
+
+        # P_f * K_4
+        ages = np.where(years == -1, np.nan, CURRENT_YEAR - years)
+        condition_factors_h1 = BridgeRisks.__get_binned(
+            bridges[Labels.CONDITION_CLASS_LABEL].to_numpy(dtype='float64'),
+            BridgeRisks.CONDITION_CLASSES,
+            BridgeRisks.CONDITION_FACTORS_H1, 'right')
+        # use worst value if the year of construction is in the future
+        condition_factors_h2 = BridgeRisks.__get_binned(
+            np.where(ages < 0, np.nan, ages), BridgeRisks.AGES,
+            BridgeRisks.CONDITION_FACTORS_H2, 'left')
+        condition_factors = (
+            0.7 * condition_factors_h1 + 0.3 * condition_factors_h2)
+
+        # K_6
+        overpass_factors = BridgeRisks.__get_overpass_factors(
+            BridgeRisks.__look_up_numbers(
+                numbers, overpass_functions, object))
+
+        # K_7
+        # The dataset is is quite chaotic. There are bridges where
+        # the span is smaller than the largest span,
+        # e.g. N13 154, Averserrhein Brücke.
+        # Therefore we use the following fallback strategy:
+        # We start with the largest span. If the largest span is unknown, we
+        # use the span, then the length and finally the default span.
+        spans = bridges[Labels.LARGEST_SPAN_LABEL].astype('float64').fillna(
+            bridges[Labels.SPAN_LABEL].astype('float64')).fillna(
+            bridges[Labels.LENGTH_LABEL].astype('float64')).fillna(
+            BridgeRisks.DEFAULT_SPAN).to_numpy()
+        static_calculation_factors = 0.7 + 5 * BridgeRisks.__get_binned(
+            spans, BridgeRisks.SPANS,
+            BridgeRisks.STATIC_CALCULATION_FACTORS_H3, 'right')
+
+        # K_8
+        bridge_type_factors = BridgeRisks.__look_up(
+            type_codes, BridgeRisks.BRIDGE_TYPE_FACTORS,
+            BridgeRisks.DEFAULT_BRIDGE_TYPE_FACTOR)
+
+        # K_9
+        material_factors = BridgeRisks.__look_up(
+            bridges[Labels.MATERIAL_CODE_LABEL].to_numpy(dtype='float64'),
+            BridgeRisks.MATERIAL_FACTORS,
+            BridgeRisks.DEFAULT_MATERIAL_FACTOR)
+
+        # K_11
+        robustness_factors = np.full(
+            len(bridges), BridgeRisks.ROBUSTNESS_FACTOR, dtype='float64')
+
+        # K_13
+        earthquake_zone_factors = BridgeRisks.__get_earthquake_zone_factors(
+            numbers, type_codes, years, bridges[Labels.NAME_LABEL],
+            earthquake_zones, skews, earthquake_checks)
+
+        # unknown factors don't change the probability of collapse
+        probabilities_of_collapse = (
+            human_error_factors *
+            np.nan_to_num(statical_determinacy_factors, nan=1) *
+            condition_factors *
+            overpass_factors *
+            static_calculation_factors *
+            bridge_type_factors *
+            material_factors *
+            robustness_factors *
+            earthquake_zone_factors)
+
+        return pd.DataFrame({
+            'norm_year': norm_years,
+            'age': ages,
+            'span': spans,
+            'human_error_factor': human_error_factors,
+            'statical_determinacy_factor': statical_determinacy_factors,
+            'condition_factor': condition_factors,
+            'overpass_factor': overpass_factors,
+            'static_calculation_factor': static_calculation_factors,
+            'bridge_type_factor': bridge_type_factors,
+            'material_factor': material_factors,
+            'robustness_factor': robustness_factors,
+            'earthquake_zone_factor': earthquake_zone_factors,
+            'probability_of_collapse': probabilities_of_collapse},
+            index=bridges.index)
 
     @staticmethod
-    def getHumanErrorFactor(normYear, yearOfConstruction):
-        # factor K_1 ("Faktor für menschliche Fehler")
-
-        # if the year of the norm generation is unknown
-        # we use the year of construction
-        if normYear is None:
-            if yearOfConstruction is None:
-                return 9
-            else:
-                relevantYear = yearOfConstruction
-        else:
-            relevantYear = normYear
-
-        if (relevantYear is None) or (relevantYear < 1967):
-            return 9
-        elif relevantYear < 1973:
-            return 6
-        elif relevantYear < 1979:
-            return 4
-        elif relevantYear < 1985:
-            return 2
-        elif relevantYear < 2003:
-            return 1
-        else:
-            return 0.5
+    def __get_norm_years(norm_texts):
+        # the texts start with the year, followed by a comma
+        # (some years are formatted like this: "1913/15")
+        # texts without year prefix have no year
+        def get_years(texts):
+            years = texts.str.extract(
+                r'^([^,/]*)(?:/[^,]*)?,', expand=False)
+            return pd.to_numeric(years.str.strip(), errors='coerce')
+        return BridgeRisks.__map_distinct(norm_texts, get_years, np.nan)
 
     @staticmethod
-    def getStaticalDeterminacyFactor(type):
-        # factor K_3 ("statische Bestimmtheit")
-        if (type == 1111) or (type == 1113):
-            # 1111: "Brücke mit Einfeldträger"
-            # 1113: "Brücke mit Gerberträger"
-            return 1
-        elif type == 1112:
-            # 1112: Brücke mit Durchlaufträger
-            return 0.014
-        else:
-            return None
+    def __map_distinct(values, function, missing_value):
+        # the texts are repeated a lot, therefore the function is applied
+        # only to the distinct texts
+        codes, distinct = pd.factorize(np.asarray(values, dtype=object))
+        results = function(pd.Series(distinct, dtype=object)).to_numpy()
+        # missing texts (code -1) get the appended missing value
+        return np.append(results, missing_value)[codes]
 
     @staticmethod
-    def getAge(yearOfConstruction):
-        if (math.isnan(yearOfConstruction) or yearOfConstruction == -1):
-            return None
-        else:
-            return CURRENT_YEAR - int(yearOfConstruction)
+    def __look_up_numbers(numbers, lookup, dtype):
+        # one dict lookup per bridge number (faster than a pandas index with
+        # the numbers as keys), missing numbers get None (which is NaN as
+        # float and False as bool)
+        return np.fromiter(
+            map(lookup.get, numbers), dtype=dtype, count=len(numbers))
 
     @staticmethod
-    def getConditionFactor(conditionClass, age):
-        # factor P_f * K_4 ("Zustandsklasse")
-        h1 = BridgeRisks.__getConditionFactorH1(conditionClass)
-        h2 = BridgeRisks.__getConditionFactorH2(age)
-        return 0.7 * h1 + 0.3 * h2
+    def __get_binned(values, bins, factors, side):
+        # side 'right': the factor of the first bin the value is smaller
+        # than, side 'left': the factor of the first bin the value is smaller
+        # than or equal to, unknown values (NaN) get the last factor
+        return np.asarray(factors, dtype='float64')[
+            np.searchsorted(bins, values, side=side)]
 
     @staticmethod
-    def __getConditionFactorH1(conditionClass):
-        # see table 3.23 ("Festlegung H1")
-        if conditionClass is None:
-            # use worst value if condition class is unknown
-            return 3e-5
-        if conditionClass < 3:
-            return 1e-6
-        if conditionClass < 4:
-            return 3e-6
-        if conditionClass < 5:
-            return 1e-5
-        else:
-            return 3e-5
+    def __look_up(codes, factors, default):
+        # the factors are stored in an array indexed by the code
+        table = np.full(max(factors) + 1, default, dtype='float64')
+        table[list(factors.keys())] = list(factors.values())
+        known = (np.isfinite(codes) & (codes >= 0) & (codes < len(table)) &
+                 (codes == np.floor(codes)))
+        indices = np.where(known, codes, 0).astype('int64')
+        return np.where(known, table[indices], default)
 
     @staticmethod
-    def __getConditionFactorH2(age):
-        # see table 3.24 ("Festlegung H2")
-        if ((age is None) or (age < 0)):
-            # use worst value if age is unknown or
-            # year of construction is in the future
-            return 1.019e-4
-        if age <= 1:
-            return 1.128e-6
-        if age <= 2:
-            return 2.112e-6
-        if age <= 5:
-            return 5.067e-6
-        if age <= 10:
-            return 9.712e-6
-        if age <= 15:
-            return 1.612e-5
-        if age <= 20:
-            return 2.066e-5
-        if age <= 30:
-            return 3.148e-5
-        if age <= 40:
-            return 4.025e-5
-        if age <= 50:
-            return 5.102e-5
-        if age <= 60:
-            return 6.079e-5
-        if age <= 70:
-            return 7.235e-5
-        if age <= 80:
-            return 8.117e-5
-        if age <= 90:
-            return 9.095e-5
-        else:
-            return 1.019e-4
+    def __get_overpass_factors(function_texts):
+        def get_factors(texts):
+            # the function texts contain non-breaking spaces
+            texts = texts.str.replace('\xa0', ' ')
+            factors = texts.map(BridgeRisks.OVERPASS_FACTORS)
+            for text in texts[factors.isna()]:
+                # should not happen with current dataset...
+                # but treat it like an unknown situation and
+                # return the highest factor
+                print('WARNING: unknown function text: "' + text + '"')
+            return factors.fillna(BridgeRisks.DEFAULT_OVERPASS_FACTOR)
+        return BridgeRisks.__map_distinct(
+            function_texts, get_factors, BridgeRisks.DEFAULT_OVERPASS_FACTOR)
 
     @staticmethod
-    def getOverpassFactor(functionText):
-        # factor K_6 ("Berücksichtigung der Überführung")
-
-        if functionText is None:
-            # return the highest factor for unknown overpass situations
-            return 8.7
-
-        # the function texts contain non-breaking spaces
-        # improve readability of the code below by
-        # replacing them with normal spaces
-        myFunctionText = functionText.replace(u'\xa0', u' ')
-
-        if ((myFunctionText == 'Überquert anderes Infrastrukturobjekt') or
-                (myFunctionText == 'Überquert Bahnanlage') or
-                (myFunctionText == 'Überquert Strasse / Weg') or
-                (myFunctionText == 'Überquert übrige Infrastruktur') or
-                (myFunctionText == 'Überquert Verkehrsweg') or
-                (myFunctionText == 'Überquert anderes')):
-            return 5
-
-        elif ((myFunctionText == 'Überquert Fluss') or
-              (myFunctionText == 'Überquert Gewässer') or
-              (myFunctionText == 'Überquert Kanal')):
-            return 8.7
-
-        elif ((myFunctionText == 'Überquert Natur') or
-              (myFunctionText == 'Überquert Leitungen')):
-            return 1
-
-        else:
-            # should not happen with current dataset...
-            # but treat it like an unknown situation and
-            # return the highest factor
-            print("WARNING: unknown function text: \"" + myFunctionText + "\"")
-            return 8.7
-
-    @staticmethod
-    def getSpan(spanText):
-        if math.isnan(spanText):
-            return None
-        else:
-            return float(spanText)
-
-    @staticmethod
-    def getStaticCalculationFactor(span):
-        # factor K_7 ("Statische Berechnung")
-
-        # If the span is unknown we use the minimal H3 value
-        if span is None or span < 6:
-            h3 = 0.0023
-        elif span < 12:
-            h3 = 0.0047
-        elif span < 18:
-            h3 = 0.0291
-        else:
-            h3 = 0.0238
-
-        return 0.7 + 5 * h3
-
-    @staticmethod
-    def getBridgeTypeFactor(type):
-        # factor K_8 ("Brückentyp")
-
-        if type == 1193:
-            # table:
-            # 1193: "Plattenbrücke"
-            # document:
-            # "Plattenbalken"
-            return 0.5
-
-        elif (type == 1111) or (type == 1112) or (type == 1113):
-            # table:
-            # 1111: "Brücke mit Einfeldträger"
-            # 1112: "Brücke mit Durchlaufträger"
-            # 1113: "Brücke mit Gerberträger"
-            # document:
-            # "Balkenbrücke"
-            return 1
-
-        elif ((type == 1123) or
-              (type == 1124) or
-              (type == 11) or
-              (type == 1125) or
-              (type == 112)):
-            # table:
-            # 1123: "Brücke mit Bogentragwerk"
-            # 1124: "Brücke mit versteiftem Stabbogen / Langerscher Balken"
-            # 11: "Brücke, Viadukt"
-            # 1125: "Gewölbekonstruktion"
-            # 112: "Rahmen-, Bogenbrücken"
-            # document:
-            # "Bogen"
-            return 2
-
-        elif ((type == 1192) or
-              (type == 1131) or
-              (type == 191) or
-              (type == 1133) or
-              (type == 119)):
-            # table:
-            # 1192: "Brücke auf Wanne"
-            # 1131: "Schrägseilbrücke"
-            # 191: "Brückenanlage"
-            # 1133: "Spannbandbrücke"
-            # 119: "Spezielle Brücke"
-            # document:
-            # "Andere"
-            return 3
-
-        elif (type == 1121) or (type == 1122):
-            # table:
-            # 1121: "Brücke mit Rahmentragwerk"
-            # 1122: "Brücke mit Sprengwerk"
-            # document:
-            # "Rahmen"
-            return 0.5
-
-        elif type == 1132:
-            # both: "Hängebrücke"
-            return 3
-
-        else:
-            # default value for unknown types
-            return 0.4
-
-    @staticmethod
-    def getMaterialCode(codeText):
-        if codeText == '\\' or math.isnan(codeText):
-            return None
-        else:
-            return float(codeText)
-
-    @staticmethod
-    def getMaterialFactor(materialCode):
-        # factor K_9 ("Baustoff")
-        if ((materialCode == 1121) or
-                (materialCode == 1122) or
-                (materialCode == 1123) or
-                (materialCode == 1124) or
-                (materialCode == 1125) or
-                (materialCode == 1126)):
-            # document: "Beton"
-            #
-            # table:
-            # 1121: "Betonkonstruktion"
-            # 1122: "Verkleidete Betonkonstruktion"
-            #       e.g. 6A - AK 1, BRÜCKE AK Herbizug Sisikon
-            # 1123: "Stahlbetonkonstruktion"
-            # 1124: "Verkleidete Stahlbetonkonstruktion"
-            # 1125: "Spannbetonkonstruktion"
-            # 1126: "Spannbetonkonstruktion (ohne Verbund)"
-            #        e.g. S0161, BRÜCKE Bachhalden
-            return 1
-
-        elif materialCode == 1141:
-            # document: "Stahl"
-            #
-            # table:
-            # 1141: "Stahlkonstruktion"
-            return 5.67
-
-        elif ((materialCode == 117) or
-              (materialCode == 1111) or
-              (materialCode == 1112) or
-              (materialCode == 1114)):
-            # document: "Holz/Mauerwerk"
-            #
-            # table:
-            # 117: "Holzkonstruktion"
-            # 1111: "Mauerwerk"
-            # 1112: "Ausbetoniertes Mauerwerk"
-            # 1114: "Trockensteinmauer mit behauenen Steinen aufgebaut"
-            #       e.g. S5811, BRÜCKE Hohsteg U57
-            return 6.67
-
-        elif (materialCode == 1152) or (materialCode == 1153):
-            # document: "Verbund"
-            #
-            # table:
-            # 1152: "Verbundkonstruktion"
-            # 1153: "Verbundkonstruktion mit Vorspannung"
-            return 1
-
-        elif ((materialCode == 1133) or
-              (materialCode == 1135) or
-              (materialCode == 1161) or
-              (materialCode == 1162)):
-            # document: "Sonstiges"
-            #
-            # table:
-            # 1133: "Wellblechkonstruktion"
-            # 1135: "Erdkonstruktion"
-            # 1161: "Seilkonstruktion"
-            #       e.g. 1.043-1, UEF FG Mühlematt Liestal
-            # 1162: "Vorgespannte Seilkonstruktion"
-            return 6.67
-
-        else:
-            # default value is largest value in list
-            # (also for empty fields or "Andere Bauart")
-            return 6.67
-
-    @staticmethod
-    def getRobustnessFactor(yearOfConstruction):
-        # factor K_11 ("Baustoff")
-
-        # changed after meeting of 2024-07-22
-        return 1
-
-        # if math.isnan(yearOfConstruction):
-        #     # if year of construction is unkown we use the maximum value
-        #     return 5
-        # else:
-        #     if yearOfConstruction < 1968:
-        #         return 5
-        #     elif yearOfConstruction < 1973:
-        #         return 4.5
-        #     elif yearOfConstruction < 1980:
-        #         return 3.3
-        #     elif yearOfConstruction < 1986:
-        #         return 1.4
-        #     elif yearOfConstruction < 2003:
-        #         return 1.2
-        #     else:
-        #         return 1
-
-    @staticmethod
-    def getEarthQuakeZoneFactor(earthQuakeCheckValue,
-                                bridgeType, bridgeName, skewValue,
-                                zoneName, yearOfConstruction):
-        # factor K_13 ("Erdbeben")
-
-        # if a successful earthquake test is available, the factor 1 is used
-        if earthQuakeCheckValue:
-            return 1
-
-        # if H4 can be determined, return this value
-        earthQuakeFactorH4 = BridgeRisks.__getEarthQuakeFactorH4(
-            bridgeType, bridgeName, skewValue)
-        if earthQuakeFactorH4 is not None:
-            return earthQuakeFactorH4
-
-        # if H4 can NOT be determined,
-        # return the collapse probability increasing factor
-        return BridgeRisks.__getCollapseProbabilityIncreasingFactor(
-                zoneName, yearOfConstruction)
-
-    @staticmethod
-    def __getCollapseProbabilityIncreasingFactor(zoneName, yearOfConstruction):
-        # see table 3.30 ("Erhöhungsfaktor der Einsturzwahrscheinlichkeit")
-        if (zoneName == 'Z1a') or (zoneName == 'Z1b'):
-            return BridgeRisks.__getEHF(yearOfConstruction, 0)
-        if (zoneName == 'Z2'):
-            return BridgeRisks.__getEHF(yearOfConstruction, 1)
-        if (zoneName == 'Z3a') or (zoneName == 'Z3b'):
-            return BridgeRisks.__getEHF(yearOfConstruction, 2)
-        else:
-            # When there are bridges outside of
-            # earthquake zones we assume zone 2.
-            return BridgeRisks.__getEHF(yearOfConstruction, 1)
-
-    @staticmethod
-    def __getEHF(yearOfConstruction, index):
-        values = [[3.0, 10.0, 15],
-                  [1.8,  3.0,  4],
-                  [1.1,  1.5,  2]]
-        if yearOfConstruction < 1970:
-            return values[0][index]
-        elif yearOfConstruction < 1989:
-            return values[1][index]
-        elif yearOfConstruction < 2003:
-            return values[2][index]
-        else:
-            return 1
-
-    @staticmethod
-    def __getEarthQuakeFactorH4(bridgeType, bridgeName, skewValue):
-        # see table 3.31 ("Faktor H 4 basierend auf Wenk, Basöz et al.")
-        if (bridgeType == 1121) or (bridgeType == 1122):
-            # 1121: "Brücke mit Rahmentragwerk"
-            # 1122: "Brücke mit Sprengwerk"
-            # simplified formula (0.25 / 0.6 == 5/12)
-            return (5 / 12)
-
-        elif ((bridgeType == 1113) or
-              ("rampe" in bridgeName.lower()) or
-              ("rampa" in bridgeName.lower()) or
-              ((skewValue is not None) and (skewValue > 30))):
-            # 1113: "Brücke mit Gerberträger"
-            # multilingual string search in name: "Rampen"
-            # Schief > 30°
-            # bridges with strange skew values get a penalty factor of 2
-            #   (e.g. N01Z34: 78031)
-            strange_skew_penalty_factor = 1
-            if ((skewValue is not None) and (skewValue > 100)):
-                strange_skew_penalty_factor = 2
-            # simplified formula (5 * 0.6 == 3)
-            return 3 * strange_skew_penalty_factor
-
-        else:
-            return None
+    def __get_earthquake_zone_factors(numbers, type_codes, years, names,
+                                      earthquake_zones, skews,
+                                      earthquake_checks):
+        # if H4 can NOT be determined, we use the collapse probability
+        # increasing factor
+        zone_columns = earthquake_zones.astype(object).map(
+            BridgeRisks.EARTHQUAKE_ZONE_COLUMNS).fillna(
+            BridgeRisks.DEFAULT_EARTHQUAKE_ZONE_COLUMN).to_numpy(
+            dtype='int64')
+        year_rows = np.searchsorted(
+            BridgeRisks.EARTHQUAKE_YEARS, years, side='right')
+        factors = BridgeRisks.EARTHQUAKE_FACTORS[year_rows, zone_columns]
+
+        # if H4 can be determined, we use this value
+        skew_values = BridgeRisks.__look_up_numbers(
+            numbers, skews, 'float64')
+        ramps = BridgeRisks.__map_distinct(
+            names,
+            lambda names: names.str.lower().str.contains(
+                BridgeRisks.RAMP_PATTERN, na=False),
+            False)
+        critical = ((type_codes == BridgeRisks.GERBER_BRIDGE_TYPE) | ramps |
+                    (skew_values > BridgeRisks.MAX_SKEW))
+        factors = np.where(
+            critical,
+            BridgeRisks.CRITICAL_FACTOR_H4 * np.where(
+                skew_values > BridgeRisks.STRANGE_SKEW,
+                BridgeRisks.STRANGE_SKEW_PENALTY_FACTOR, 1),
+            factors)
+        factors = np.where(
+            np.isin(type_codes, BridgeRisks.FRAME_BRIDGE_TYPES),
+            BridgeRisks.FRAME_BRIDGE_FACTOR_H4, factors)
+
+        # if a successful earthquake check is available, the factor 1 is
+        # used
+        checked = BridgeRisks.__look_up_numbers(
+            numbers, earthquake_checks, bool)
+        return np.where(checked, 1, factors)
@@ -0,0 +1,87 @@
+import numpy as np
+import shapely
+from functools import cache
+from pyproj import Transformer
+
+
+class Coordinates:
+    """Converts coordinate arrays between the Swiss and the world CRS.
+
+    The KUBA data uses the Swiss coordinates (LV95, EPSG:2056) and Leaflet
+    always works in WGS84 (EPSG:4326). All coordinates are converted in bulk
+    with one cached transformer per pair of CRS.
+    """
+
+    LV95 = 'EPSG:2056'
+    WGS84 = 'EPSG:4326'
+
+    @staticmethod
+    @cache
+    def get_transformer(source_crs: str, target_crs: str) -> Transformer:
+        """Returns the (cached) transformer between two CRS.
+
+        Parameters
+        ----------
+        source_crs : str
+            The CRS of the given coordinates
+        target_crs : str
+            The CRS of the transformed coordinates
+
+        Returns
+        -------
+        pyproj.Transformer
+            The transformer, always using the order (x, y) resp.
+            (longitude, latitude)
+        """
+        return Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+    @staticmethod
+    def create_points(x, y, source_crs: str = LV95,
+                      target_crs: str = WGS84) -> np.ndarray:
+        """Creates points from coordinate arrays.
+
+        Parameters
+        ----------
+        x : array_like
+            The x coordinates (easting resp. longitude)
+        y : array_like
+            The y coordinates (northing resp. latitude)
+        source_crs : str
+            The CRS of the given coordinates (default is LV95)
+        target_crs : str
+            The CRS of the points (default is WGS84)
+
+        Returns
+        -------
+        numpy.ndarray
+            The points, rows with a missing coordinate get an empty point
+        """
+        x = np.asarray(x, dtype='float64')
+        y = np.asarray(y, dtype='float64')
+        if source_crs != target_crs:
+            x, y = Coordinates.get_transformer(
+                source_crs, target_crs).transform(x, y)
+        points = shapely.points(x, y)
+        points[np.isnan(x) | np.isnan(y)] = shapely.Point()
+        return points
+
+    @staticmethod
+    def to_wgs84(points, source_crs: str = LV95) -> np.ndarray:
+        """Converts points to WGS84.
+
+        Parameters
+        ----------
+        points : array_like
+            The points
+        source_crs : str
+            The CRS of the given points (default is LV95)
+
+        Returns
+        -------
+        numpy.ndarray
+            The points in WGS84, empty points stay empty
+        """
+        transformer = Coordinates.get_transformer(
+            source_crs, Coordinates.WGS84)
+        return shapely.transform(
+            np.asarray(points), transformer.transform, interleaved=False)
@@ -0,0 +1,212 @@
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from Coordinates import Coordinates
+from StructureIndex import StructureIndex
+
+
+class EarthquakeScenarios:
+    """Evaluates deterministic earthquake scenarios for a set of structures.
+
+    A scenario is an earthquake with an epicentre and a magnitude. The
+    macroseismic intensity at a structure follows a simple attenuation law:
+
+        I = A + B * M - C * log10(R)
+
+    where M is the magnitude and R the hypocentral distance in km (the
+    epicentral distance combined with the depth of the earthquake). All
+    structures where the intensity reaches the damage threshold are
+    affected (the footprint of the scenario). They are found with a spatial
+    index.
+
+    Every intensity degree above the threshold multiplies the probability of
+    collapse of a structure with the intensity growth factor. The
+    probability of collapse already contains the earthquake factor (K_13) of
+    the structure, so vulnerable structures are affected more. The expected
+    loss of a structure is the scaled probability of collapse times its
+    damage costs. All calculations are vectorized over the affected
+    structures.
+
+    Structures with an unknown probability of collapse are affected, but
+    their expected loss is unknown (NaN). They are not included in the sums
+    of the expected losses and are counted separately.
+    """
+
+    # the coefficients of the attenuation law
+    INTENSITY_A = 2.0
+    INTENSITY_B = 1.5
+    INTENSITY_C = 3.0
+    # the depth of the earthquakes in km
+    DEPTH = 10
+    # the intensity from which on structures are damaged (EMS-98 VI)
+    DAMAGE_INTENSITY = 6
+    # the factor by which the probability of collapse grows per intensity
+    # degree above the damage threshold
+    INTENSITY_GROWTH = 10
+
+    def __init__(self,
+                 points: gpd.GeoSeries,
+                 probabilities_of_collapse,
+                 damage_costs,
+                 axes,
+                 zones) -> None:
+        """Initialize the EarthquakeScenarios with the structures.
+
+        Parameters
+        ----------
+        points : geopandas.GeoSeries
+            The points of the structures in LV95
+        probabilities_of_collapse : array_like
+            The probability of collapse of every structure
+        damage_costs : array_like
+            The damage costs of every structure
+        axes : array_like
+            The axis of every structure
+        zones : array_like
+            The earthquake zone of every structure
+        """
+        structures = gpd.GeoDataFrame({
+            'probability_of_collapse': np.asarray(
+                probabilities_of_collapse, dtype='float64'),
+            'damage_costs': np.asarray(damage_costs, dtype='float64'),
+            'axis': np.asarray(axes, dtype=object),
+            'zone': np.asarray(zones, dtype=object)},
+            geometry=np.asarray(points), crs=Coordinates.LV95)
+        self.structure_index = StructureIndex(structures)
+
+    @staticmethod
+    def get_footprint_radius(magnitude: float) -> float:
+        """Returns the radius of the footprint of an earthquake.
+
+        Parameters
+        ----------
+        magnitude : float
+            The magnitude of the earthquake
+
+        Returns
+        -------
+        float
+            The epicentral distance in meters up to which the intensity
+            reaches the damage threshold (0 if it is never reached)
+        """
+        log_distance = (
+            EarthquakeScenarios.INTENSITY_A +
+            EarthquakeScenarios.INTENSITY_B * magnitude -
+            EarthquakeScenarios.DAMAGE_INTENSITY) / (
+                EarthquakeScenarios.INTENSITY_C)
+        squared_radius = (
+            10 ** (2 * log_distance) - EarthquakeScenarios.DEPTH ** 2)
+        return 1000 * np.sqrt(max(squared_radius, 0))
+
+    @staticmethod
+    def get_intensities(distances, magnitude: float) -> np.ndarray:
+        """Returns the intensities of an earthquake.
+
+        Parameters
+        ----------
+        distances : array_like
+            The epicentral distances in meters
+        magnitude : float
+            The magnitude of the earthquake
+
+        Returns
+        -------
+        numpy.ndarray
+            The intensity at every distance
+        """
+        hypocentral_distances = np.hypot(
+            np.asarray(distances, dtype='float64') / 1000,
+            EarthquakeScenarios.DEPTH)
+        return (EarthquakeScenarios.INTENSITY_A +
+                EarthquakeScenarios.INTENSITY_B * magnitude -
+                EarthquakeScenarios.INTENSITY_C *
+                np.log10(hypocentral_distances))
+
+    def evaluate(self, x: float, y: float, magnitude: float,
+                 crs: str = Coordinates.LV95) -> tuple:
+        """Evaluates a scenario.
+
+        Parameters
+        ----------
+        x : float
+            The x coordinate (easting resp. longitude) of the epicentre
+        y : float
+            The y coordinate (northing resp. latitude) of the epicentre
+        magnitude : float
+            The magnitude of the earthquake
+        crs : str
+            The CRS of the epicentre (default is LV95)
+
+        Returns
+        -------
+        tuple
+            - the affected structures (with the additional columns
+              'distance', 'intensity', 'scenario_probability_of_collapse'
+              and 'expected_loss'), sorted by distance
+            - the expected loss per axis (structures without an axis are
+              summed up under a missing axis)
+            - the expected loss per zone (structures without a zone are
+              summed up under a missing zone)
+        """
+        structures = self.__get_affected_structures(x, y, magnitude, crs)
+        return (structures,
+                EarthquakeScenarios.__sum_losses(structures, 'axis'),
+                EarthquakeScenarios.__sum_losses(structures, 'zone'))
+
+    def evaluate_all(self, scenarios: pd.DataFrame,
+                     crs: str = Coordinates.LV95) -> pd.DataFrame:
+        """Evaluates many scenarios.
+
+        Parameters
+        ----------
+        scenarios : pandas.DataFrame
+            The scenarios with the columns 'x', 'y' (the epicentre) and
+            'magnitude'
+        crs : str
+            The CRS of the epicentres (default is LV95)
+
+        Returns
+        -------
+        pandas.DataFrame
+            The number of affected structures ('affected'), the number of
+            affected structures with an unknown probability of collapse
+            ('unknown') and the total expected loss ('expected_loss') of
+            every scenario (with the index of the scenarios)
+        """
+        affected = []
+        unknown = []
+        expected_losses = []
+        for x, y, magnitude in zip(scenarios['x'], scenarios['y'],
+                                   scenarios['magnitude']):
+            structures = self.__get_affected_structures(
+                x, y, magnitude, crs)
+            affected.append(len(structures))
+            unknown.append(structures['expected_loss'].isna().sum())
+            expected_losses.append(structures['expected_loss'].sum())
+        return pd.DataFrame({'affected': affected,
+                             'unknown': unknown,
+                             'expected_loss': expected_losses},
+                            index=scenarios.index)
+
+    def __get_affected_structures(self, x, y, magnitude, crs):
+        structures = self.structure_index.within_radius(
+            x, y, EarthquakeScenarios.get_footprint_radius(magnitude), crs)
+        intensities = EarthquakeScenarios.get_intensities(
+            structures['distance'].to_numpy(), magnitude)
+        growth = EarthquakeScenarios.INTENSITY_GROWTH ** (
+            intensities - EarthquakeScenarios.DAMAGE_INTENSITY)
+        # 1 - (1 - p) ** growth, which is about p * growth for small
+        # probabilities but never exceeds 1
+        probabilities = -np.expm1(np.log1p(
+            -structures['probability_of_collapse'].to_numpy()) * growth)
+        return structures.assign(
+            intensity=intensities,
+            scenario_probability_of_collapse=probabilities,
+            expected_loss=probabilities * structures['damage_costs'])
+
+    @staticmethod
+    def __sum_losses(structures, label):
+        # structures without a label are kept (as a missing label), so that
+        # the losses per label add up to the total loss
+        return structures.groupby(label, sort=True, dropna=False)[
+            'expected_loss'].sum().sort_values(ascending=False, kind='stable')
@@ -1,15 +1,16 @@
 import geopandas as gpd
 import gettext
 import ipywidgets as widgets
-import json
 import math
+import numpy as np
 import pandas as pd
+import shapely
 from babel.numbers import format_currency
 from branca.colormap import linear
 from functools import cache
 from ipyleaflet import (basemaps, basemap_to_tiles, Choropleth, CircleMarker,
-                        Layer, LayerGroup, LayersControl, LegendControl, Map,
-                        MarkerCluster, WidgetControl)
+                        Layer, LayerGroup, LayersControl, LegendControl,
+                        LocalTileLayer, Map, MarkerCluster, WidgetControl)
 from IPython.display import display, HTML
 from ProgressBar import ProgressBar
 
@@ -26,9 +27,16 @@ class InteractiveMap:
     """An interactive map for exploring the KUBA dataset.
     """
 
+    EARTHQUAKE_ZONES_COLORMAP = linear.YlOrRd_04
+    PRECIPITATION_ZONES_COLORMAP = linear.Spectral_10
+
+    # the coordinates of the zones are sent to the browser with this number
+    # of decimal places (1e-5 degrees are about one meter)
+    ZONE_COORDINATE_DIGITS = 5
+
     def __init__(self, progress_bar: ProgressBar,
-                 earthquake_zones_choropleth: Choropleth,
-                 precipitation_zones_choropleth: Choropleth,
+                 earthquake_zones_choropleths: dict,
+                 precipitation_zones_choropleths: dict,
                  marker_key: str,
                  show_headings: bool) -> None:
         """Initialize the InteractiveMap with the known number of steps.
@@ -37,8 +45,14 @@ class InteractiveMap:
         ----------
         progress_bar : ProgressBar
             The progress bar for showing the progress while loading the map
-        earthquake_zones : geopandas.geodataframe.GeoDataFrame
-            The earthquake zones
+        earthquake_zones_choropleths : dict
+            The choropleths (or tile layers) of the earthquake zones per
+            level of detail (the minimal zoom level of the map mapped to the
+            layer or to a function that creates the layer when the map is
+            zoomed to this level for the first time)
+        precipitation_zones_choropleths : dict
+            The choropleths (or tile layers) of the precipitation zones per
+            level of detail
         marker_key: str
             The key that is used for creating the markers
         """
@@ -66,9 +80,20 @@ class InteractiveMap:
             zoom=8)
         self.map.layout.height = '1200px'
 
-        # add choropleths
-        self.map.add(earthquake_zones_choropleth)
-        self.map.add(precipitation_zones_choropleth)
+        # add choropleths with the level of detail of the current zoom level
+        # and switch to another level of detail when zooming (every layer has
+        # its own levels of detail, e.g. a single tile layer for all zoom
+        # levels or several choropleths)
+        self.zone_choropleths = [earthquake_zones_choropleths,
+                                 precipitation_zones_choropleths]
+        self.zone_levels = [
+            InteractiveMap.__get_zone_level(choropleths, self.map.zoom)
+            for choropleths in self.zone_choropleths]
+        for choropleths, zone_level in zip(self.zone_choropleths,
+                                           self.zone_levels):
+            self.map.add(InteractiveMap.__get_choropleth(
+                choropleths, zone_level))
+        self.map.observe(self.__zoom_changed, names='zoom')
 
         # add control to enable or disable the
         # base, earthquake and precipitation layers
@@ -77,12 +102,13 @@ class InteractiveMap:
         self.map.add(layers_control)
 
         # add legend for earthquake zones
+        colormap = InteractiveMap.EARTHQUAKE_ZONES_COLORMAP
         self.map.add(LegendControl(
-            {"Z1a": earthquake_zones_choropleth.colormap(0),
-             "Z1b": earthquake_zones_choropleth.colormap(0.25),
-             "Z2": earthquake_zones_choropleth.colormap(0.5),
-             "Z3a": earthquake_zones_choropleth.colormap(0.75),
-             "Z3b": earthquake_zones_choropleth.colormap(1)},
+            {"Z1a": colormap(0),
+             "Z1b": colormap(0.25),
+             "Z2": colormap(0.5),
+             "Z3a": colormap(0.75),
+             "Z3b": colormap(1)},
             title=_('Earthquake zones'),
             position="topright"))
 
@@ -92,6 +118,38 @@ class InteractiveMap:
         self.map.add_control(WidgetControl(
             widget=self.cluster_button, position='topleft'))
 
+    def __zoom_changed(self, change):
+        for i, choropleths in enumerate(self.zone_choropleths):
+            zone_level = InteractiveMap.__get_zone_level(
+                choropleths, change['new'])
+            if zone_level == self.zone_levels[i]:
+                continue
+            old_choropleth = choropleths[self.zone_levels[i]]
+            if old_choropleth in self.map.layers:
+                self.map.substitute(old_choropleth,
+                                    InteractiveMap.__get_choropleth(
+                                        choropleths, zone_level))
+            self.zone_levels[i] = zone_level
+
+    @staticmethod
+    def __get_choropleth(choropleths, zone_level):
+        # A widget sends its whole state to the browser when it is created,
+        # therefore the finer levels of detail are only created when they are
+        # shown for the first time. The created layer replaces the function,
+        # so that all maps sharing the choropleths use the same layer.
+        choropleth = choropleths[zone_level]
+        if not isinstance(choropleth, Layer):
+            choropleth = choropleth()
+            choropleths[zone_level] = choropleth
+        return choropleth
+
+    @staticmethod
+    def __get_zone_level(choropleths, zoom):
+        # the level of detail with the highest minimal zoom level that is
+        # reached, the coarsest level if the map is zoomed out even further
+        levels = [level for level in choropleths if level <= zoom]
+        return max(levels) if levels else min(choropleths)
+
     @staticmethod
     def create_bridge_popup(
             bridge_name: str,
@@ -387,10 +445,11 @@ class InteractiveMap:
     @staticmethod
     def create_earthquake_zones_choropleth(
             earthquake_zones: gpd.geodataframe.GeoDataFrame) -> Choropleth:
+        # the zones are colored by their position
         return Choropleth(
-            geo_data=json.loads(earthquake_zones.to_json()),
-            choro_data={'0': 0, '1': 1, '2': 2, '3': 3, '4': 4},
-            colormap=linear.YlOrRd_04,
+            geo_data=InteractiveMap.__to_geo_data(earthquake_zones, 'ZONE'),
+            choro_data={str(i): i for i in range(len(earthquake_zones))},
+            colormap=InteractiveMap.EARTHQUAKE_ZONES_COLORMAP,
             border_color='black',
             style={'fillOpacity': 0.5, 'dashArray': '5, 5'},
             name=_('Earthquake zones'))
@@ -398,24 +457,141 @@ class InteractiveMap:
     @staticmethod
     def create_precipitation_zones_choropleth(
             precipitation_zones: gpd.geodataframe.GeoDataFrame) -> Choropleth:
-        # replace NaN values with '0'
-        precipitation_zones.loc[precipitation_zones['DN'].isna(), 'DN'] = 0
-        # we have to simplify the geometry, otherwise we get a MemoryError
-        precipitation_zones['geometry'] = (
-            precipitation_zones['geometry'].simplify(tolerance=0.0001))
-        precipitation_geo_data = json.loads(precipitation_zones.to_json())
+        # the zones must already be simplified and without NaN values
+        # (see ZoneLayers.prepare_precipitation_zones)
         # create dictionary of "id":"DN" as choro_data
         precipitation_choro_data = {
-            str(feature["id"]): feature["properties"]["DN"] for feature in (
-                precipitation_geo_data["features"])}
+            str(i): value
+            for i, value in enumerate(precipitation_zones['DN'].tolist())}
         return Choropleth(
-            geo_data=precipitation_geo_data,
+            geo_data=InteractiveMap.__to_geo_data(precipitation_zones, 'DN'),
             choro_data=precipitation_choro_data,
-            colormap=linear.Spectral_10,
+            colormap=InteractiveMap.PRECIPITATION_ZONES_COLORMAP,
             border_color='black',
             style={'fillOpacity': 0.5, 'dashArray': '5, 5'},
             name=_('Precipitation zones'))
 
+    @staticmethod
+    def __to_geo_data(zones, value_column):
+        # Creates the GeoJSON dictionary of the zones directly from the
+        # geometry (instead of json.loads(zones.to_json()), which builds the
+        # whole GeoJSON string and a copy of it). The features get their
+        # position as id and only the value column as property. The
+        # coordinates are rounded and points that become identical by
+        # rounding are dropped.
+        features = []
+        for i, (geometry, value) in enumerate(zip(
+                zones.geometry.values, zones[value_column].tolist())):
+            polygons = []
+            for polygon in shapely.get_parts(geometry):
+                if not isinstance(polygon, shapely.Polygon):
+                    continue
+                rings = [InteractiveMap.__to_ring(ring)
+                         for ring in shapely.get_rings(polygon)]
+                # rings that collapsed by rounding are dropped, the polygon
+                # if its exterior collapsed
+                if rings[0] is not None:
+                    polygons.append([ring for ring in rings
+                                     if ring is not None])
+            if not polygons:
+                continue
+            if len(polygons) == 1:
+                geo_geometry = {'type': 'Polygon',
+                                'coordinates': polygons[0]}
+            else:
+                geo_geometry = {'type': 'MultiPolygon',
+                                'coordinates': polygons}
+            features.append({'id': str(i),
+                             'type': 'Feature',
+                             'properties': {value_column: value},
+                             'geometry': geo_geometry})
+        return {'type': 'FeatureCollection', 'features': features}
+
+    @staticmethod
+    def __to_ring(ring):
+        coordinates = np.round(shapely.get_coordinates(ring),
+                               InteractiveMap.ZONE_COORDINATE_DIGITS)
+        changed = np.ones(len(coordinates), dtype=bool)
+        changed[1:] = (coordinates[1:] != coordinates[:-1]).any(axis=1)
+        coordinates = coordinates[changed]
+        # a closed ring needs at least four points
+        if len(coordinates) < 4:
+            return None
+        return coordinates.tolist()
+
+    @staticmethod
+    def get_earthquake_zone_colors(
+            earthquake_zones: gpd.geodataframe.GeoDataFrame) -> list:
+        """Returns the colors of the earthquake zones in the choropleth.
+
+        Parameters
+        ----------
+        earthquake_zones : geopandas.geodataframe.GeoDataFrame
+            The earthquake zones
+
+        Returns
+        -------
+        list
+            The color of every zone
+        """
+        # the choropleth colors the zones by their position
+        return InteractiveMap.__get_colors(
+            InteractiveMap.EARTHQUAKE_ZONES_COLORMAP,
+            range(len(earthquake_zones)))
+
+    @staticmethod
+    def get_precipitation_zone_colors(
+            precipitation_zones: gpd.geodataframe.GeoDataFrame) -> list:
+        """Returns the colors of the precipitation zones in the choropleth.
+
+        Parameters
+        ----------
+        precipitation_zones : geopandas.geodataframe.GeoDataFrame
+            The precipitation zones (without NaN values)
+
+        Returns
+        -------
+        list
+            The color of every zone
+        """
+        return InteractiveMap.__get_colors(
+            InteractiveMap.PRECIPITATION_ZONES_COLORMAP,
+            precipitation_zones['DN'])
+
+    @staticmethod
+    def __get_colors(colormap, values):
+        # the same scaling as in the choropleths
+        values = list(values)
+        colormap = colormap.scale(min(values), max(values))
+        return [colormap(value) for value in values]
+
+    @staticmethod
+    def create_zone_tile_layer(directory: str,
+                               metadata: dict,
+                               name: str) -> LocalTileLayer:
+        """Creates a layer with the prebuilt tiles of zones.
+
+        Parameters
+        ----------
+        directory : str
+            The tile directory (relative to the notebook)
+        metadata : dict
+            The metadata of the tiles (see ZoneTiles.get_metadata)
+        name : str
+            The name of the layer
+
+        Returns
+        -------
+        ipyleaflet.LocalTileLayer
+            The tile layer
+        """
+        return LocalTileLayer(
+            path=directory + '/{z}/{x}/{y}.png',
+            min_native_zoom=metadata['min_zoom'],
+            max_native_zoom=metadata['max_zoom'],
+            bounds=metadata['bounds'],
+            name=name)
+
     def add_marker(self,
                    point: gpd.geodataframe.GeoDataFrame,
                    popup: HTML) -> None:
@@ -461,17 +637,19 @@ class InteractiveMap:
 
         # sort list by value, so that the markers with the highest
         # value are painted at the top
-        self.markers.sort(key=lambda marker: marker.value)
+        # (we sort a copy, self.markers must stay in the order of the values
+        # because this method is called again while streaming)
+        sorted_markers = sorted(self.markers, key=lambda marker: marker.value)
 
         # update layer with clustered markers
         self.__remove_layer(self.clustered_markers)
         self.clustered_markers = MarkerCluster(
-            markers=self.markers, name=_("Clustered Bridges"))
+            markers=sorted_markers, name=_("Clustered Bridges"))
 
         # update layer with single markers
         self.__remove_layer(self.single_markers)
         self.single_markers = LayerGroup(
-            layers=self.markers, name=_("Individual Bridges"))
+            layers=sorted_markers, name=_("Individual Bridges"))
         self.map.add(self.single_markers)
 
     def display(self):
@@ -1,29 +1,41 @@
 import geopandas as gpd
 import gettext
+import hashlib
 import ipywidgets as widgets
-import json
 import math
-import os.path
+import os
 import pandas as pd
 import time
 import traceback
 from babel.dates import format_date
 from datetime import datetime
-from functools import cache
+from functools import cache, partial
 from IPython.display import display
-from json import JSONDecodeError
-from shapely.geometry import Point
 import Labels
+from AxisResolver import AxisResolver
 from BridgeDamageParameters import BridgeDamageParameters
 from BridgePlots import BridgePlots
-from BridgeRisks import BridgeRisks
+from BridgeRisks import BridgeRisks, CURRENT_YEAR
+from Coordinates import Coordinates
+from EarthquakeScenarios import EarthquakeScenarios
 from InteractiveBridgesTable import InteractiveBridgesTable
 from InteractiveMap import InteractiveMap
 from InteractiveSupportStructuresTable import InteractiveSupportStructuresTable
+from ParallelLoader import ParallelLoader
 from ProgressBar import ProgressBar
+from ResultStore import ResultStore
+from SnapshotCache import SnapshotCache
+from StructureIndex import StructureIndex
 from SupportStructureDamageParameters import SupportStructureDamageParameters
 from SupportStructurePlots import SupportStructurePlots
 from SupportStructureRisks import SupportStructureRisks
+from TrafficBulletin import TrafficBulletin
+from TrafficTable import TrafficTable
+from WorkbookLoader import WorkbookLoader
+from ZoneCache import ZoneCache
+from ZoneLayers import ZoneLayers
+from ZoneRaster import ZoneRaster
+from ZoneTiles import ZoneTiles
 
 
 from warnings import simplefilter
@@ -32,8 +44,27 @@ simplefilter(action="ignore", category=pd.errors.PerformanceWarning)
 gettext.bindtextdomain('kuba', 'translations')
 gettext.textdomain('kuba')
 
-earthquake_zones_dict_file_name = "data/earthquakezones.json"
-precipitation_zones_dict_file_name = "data/precipitationzones.json"
+earthquake_zone_cache_file_name = "data/snapshots/earthquake_zones.pkl"
+precipitation_zone_cache_file_name = (
+    "data/snapshots/precipitation_zones.pkl")
+snapshot_directory_name = "data/snapshots"
+bridge_results_file_name = "data/snapshots/bridge_results.pkl"
+support_structure_results_file_name = (
+    "data/snapshots/support_structure_results.pkl")
+bridge_index_file_name = "data/snapshots/bridge_index.pkl"
+support_structure_index_file_name = (
+    "data/snapshots/support_structure_index.pkl")
+traffic_file_name = 'data/Bulletin_2023_de.xlsx'
+kuba_file_name = 'data/Bauwerksdaten aus KUBA.xlsx'
+bridges_sheet_name = 'Alle Brücken mit Zusatzinfos'
+support_structures_file_name = (
+    'data/Abfrage alle Infrastrukturobj Zusatzinfos inkl Nutzung.xlsx')
+support_structures_sheet_name = '2024-04-18 aus KUBA+Funktion'
+# the number of rows per chunk in streaming mode
+streaming_chunk_size = 1000
+# how the monthly traffic values of an axis are averaged
+# (see TrafficTable)
+traffic_aggregation = TrafficTable.MEAN_OF_MEANS
 
 
 @cache
@@ -113,66 +144,169 @@ class KUBA:
         "H21": "H 21"
     }
 
-    def __init__(self, progress_bar: ProgressBar) -> None:
+    def __init__(self,
+                 progress_bar: ProgressBar,
+                 streaming: bool = False) -> None:
+        # In streaming mode the sheets with bridges and support structures
+        # are not loaded here. Instead, loadBridges() and
+        # load_support_structures() read them in chunks and process every
+        # chunk as soon as it is read. Only the current chunk is kept in
+        # self.bridges and self.support_structures.
         self.progress_bar = progress_bar
-
-        # read file with data
-        self.progress_bar.update_progress(
-            description=_('Loading building data'))
+        self.streaming = streaming
 
         # dfAllBuildings = pd.read_excel(
         #     open('data/Bauwerksdaten aus KUBA.xlsx', 'rb'),
         #     sheet_name='Alle Bauwerke mit Zusatzinfo')
 
-        self.dfBuildings = pd.read_excel(
-            open('data/Bauwerksdaten aus KUBA.xlsx', 'rb'),
-            sheet_name='Alle Bauwerke mit Zusatzinfo')
-
-        dfBridges = pd.read_excel(
-            open('data/Bauwerksdaten aus KUBA.xlsx', 'rb'),
-            sheet_name='Alle Brücken mit Zusatzinfos')
-
-        self.dfEarthquakeCheck = pd.read_excel(
-            open('data/Bauwerksdaten aus KUBA.xlsx', 'rb'),
-            sheet_name='Bauwerke mitErdbebenüberprüfung')
-
-        self.dfMaintenance = pd.read_excel(
-            open('data/Bauwerksdaten aus KUBA.xlsx', 'rb'),
-            sheet_name='BW letzte Erhaltungsmassnahme')
-
-        self.df_support_structures = pd.read_excel(
-            open('data/Abfrage alle Infrastrukturobj ' +
-                 'Zusatzinfos inkl Nutzung.xlsx', 'rb'),
-            sheet_name='2024-04-18 aus KUBA+Funktion')
-
-        # load traffic data
-        self.progress_bar.update_progress(
-            description=_('Loading traffic data'))
-        self.df_traffic_data = pd.read_excel(
-            open('data/Bulletin_2023_de.xlsx', 'rb'),
-            sheet_name='DTV mit Klassen')
-
-        # load pre-calculated earthquake zone data
-        self.earthquake_zones_dict = {}
-        try:
-            if os.path.isfile(earthquake_zones_dict_file_name):
-                with open(earthquake_zones_dict_file_name) as file:
-                    self.earthquake_zones_dict = json.load(file)
-        except JSONDecodeError:
-            # This only happens when we empty earthquakezones.json to enforce a
-            # recalculation.
-            pass
-
-        # load pre-calculated precipitation zone data
-        self.precipitation_zones_dict = {}
-        try:
-            if os.path.isfile(precipitation_zones_dict_file_name):
-                with open(precipitation_zones_dict_file_name) as file:
-                    self.precipitation_zones_dict = json.load(file)
-        except JSONDecodeError:
-            # This only happens when we empty precipitationzones.json to
-            # enforce a recalculation.
-            pass
+        # None of the inputs depends on another one, therefore we load all
+        # of them concurrently.
+        # All sheets are read from snapshots of previous runs if the
+        # workbooks didn't change. Otherwise all four sheets are read from
+        # the same workbook in a single pass.
+        snapshot_cache = SnapshotCache(snapshot_directory_name)
+        self.label_columns = WorkbookLoader.get_label_columns()
+        kuba_sheet_names = ['Alle Bauwerke mit Zusatzinfo',
+                            'Bauwerke mitErdbebenüberprüfung',
+                            'BW letzte Erhaltungsmassnahme']
+        if not self.streaming:
+            kuba_sheet_names.append(bridges_sheet_name)
+        # the maps use prebuilt tiles of the zones (see ZoneTiles.py) if
+        # they match the zone shapefiles, otherwise choropleths
+        earthquake_zone_tiles = ZoneTiles.get_metadata(
+            ZoneTiles.EARTHQUAKE_ZONES_DIRECTORY,
+            snapshot_cache.get_file_hash(
+                ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME))
+        precipitation_zone_tiles = ZoneTiles.get_metadata(
+            ZoneTiles.PRECIPITATION_ZONES_DIRECTORY,
+            snapshot_cache.get_file_hash(
+                ZoneLayers.PRECIPITATION_ZONES_FILE_NAME))
+        tasks = {
+            'kuba': (
+                _('Loading building data'),
+                snapshot_cache.read_sheets,
+                (kuba_file_name, kuba_sheet_names, self.label_columns)),
+            # the bulletin is parsed into a tidy table (see TrafficBulletin)
+            'traffic': (
+                _('Loading traffic data'),
+                TrafficBulletin.read,
+                (snapshot_cache, traffic_file_name)),
+            # the zones are used in LV95 (metric) for all calculations, the
+            # maps get versions that are already reprojected and simplified
+            'earthquake_zones': (
+                _('Loading earthquake zones'),
+                ZoneLayers.read_earthquake_zones,
+                (snapshot_cache,)),
+            'precipitation_zones': (
+                _('Loading precipitation zones'),
+                ZoneLayers.read_precipitation_zones,
+                (snapshot_cache,))}
+        if earthquake_zone_tiles is None:
+            tasks['earthquake_zones_display'] = (
+                _('Loading earthquake zones'),
+                ZoneLayers.read_earthquake_zones_for_display,
+                (snapshot_cache,))
+        if precipitation_zone_tiles is None:
+            tasks['precipitation_zones_display'] = (
+                _('Loading precipitation zones'),
+                ZoneLayers.read_precipitation_zones_for_display,
+                (snapshot_cache,))
+        if not self.streaming:
+            tasks['support_structures'] = (
+                _('Loading building data'),
+                snapshot_cache.read_sheets,
+                (support_structures_file_name,
+                 [support_structures_sheet_name],
+                 self.label_columns))
+        inputs = ParallelLoader.load(tasks, self.progress_bar)
+
+        kuba_sheets = inputs['kuba']
+
+        self.dfBuildings = kuba_sheets['Alle Bauwerke mit Zusatzinfo']
+
+        self.dfEarthquakeCheck = kuba_sheets[
+            'Bauwerke mitErdbebenüberprüfung']
+
+        self.dfMaintenance = kuba_sheets['BW letzte Erhaltungsmassnahme']
+
+        # The values of the other sheets that are needed for every bridge
+        # are looked up by the bridge number. The lookups are built once
+        # instead of scanning the sheets for every bridge.
+        self.overpass_functions = KUBA.__create_lookup(
+            self.dfBuildings[
+                self.dfBuildings[Labels.FUNCTION_LABEL].str.startswith(
+                    'Überquert', na=False)],
+            Labels.ALL_BUILDINGS_NUMBER_LABEL, Labels.FUNCTION_LABEL)
+        self.skews = KUBA.__create_lookup(
+            self.dfBuildings, Labels.ALL_BUILDINGS_NUMBER_LABEL,
+            Labels.SKEW_LABEL)
+        self.earthquake_checks = KUBA.__create_lookup(
+            self.dfEarthquakeCheck, Labels.NUMBER_LABEL,
+            Labels.EARTHQUAKE_CHECK_LABEL)
+        self.maintenance_acceptance_dates = KUBA.__create_lookup(
+            self.dfMaintenance, Labels.NUMBER_LABEL,
+            Labels.MAINTENANCE_ACCEPTANCE_DATE_LABEL)
+
+        self.traffic_bulletin = inputs['traffic']
+        self.traffic_table = TrafficTable(
+            self.traffic_bulletin, traffic_aggregation)
+        # the axes of the structures are resolved to the axes of the
+        # bulletin once per sheet (see AxisResolver)
+        self.axis_resolver = AxisResolver(
+            self.traffic_mapping,
+            self.traffic_bulletin.index.get_level_values('axis').unique())
+
+        self.earthquake_zones = inputs['earthquake_zones']
+        self.precipitation_zones = inputs['precipitation_zones']
+
+        # the zones of the structures are calculated only once (as long as
+        # the zone shapefiles don't change)
+        self.earthquake_zone_cache = ZoneCache(
+            earthquake_zone_cache_file_name,
+            snapshot_cache.get_file_hash(
+                ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME))
+        self.precipitation_zone_cache = ZoneCache(
+            precipitation_zone_cache_file_name,
+            snapshot_cache.get_file_hash(
+                ZoneLayers.PRECIPITATION_ZONES_FILE_NAME))
+        # optional rasters of the zones for fast lookups of many structures
+        # (None if KUBA_ZONE_RASTER_RESOLUTION is not set)
+        self.earthquake_zone_raster = ZoneRaster.get(
+            self.earthquake_zones, 'ZONE',
+            os.path.join(snapshot_directory_name, 'earthquake_zones'),
+            self.earthquake_zone_cache.zones_hash)
+        self.precipitation_zone_raster = ZoneRaster.get(
+            self.precipitation_zones, 'DN',
+            os.path.join(snapshot_directory_name, 'precipitation_zones'),
+            self.precipitation_zone_cache.zones_hash)
+
+        # The results of the last run are reused for all structures whose
+        # inputs didn't change. The traffic data (and how it is averaged),
+        # the mapping of the axes, the zones, the language (the results
+        # contain translated texts) and the current year (the ages and the
+        # age-based factors) affect all structures.
+        context = (
+            snapshot_cache.get_file_hash(traffic_file_name),
+            traffic_aggregation,
+            AxisResolver.VERSION,
+            sorted(self.traffic_mapping.items()),
+            snapshot_cache.get_file_hash(
+                ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME),
+            snapshot_cache.get_file_hash(
+                ZoneLayers.PRECIPITATION_ZONES_FILE_NAME),
+            _('unknown'),
+            CURRENT_YEAR)
+        self.bridge_results = ResultStore(bridge_results_file_name, context)
+        self.support_structure_results = ResultStore(
+            support_structure_results_file_name, context)
+        # the rows of the other sheets that are used to calculate the risk
+        # of a bridge
+        self.building_hashes = ResultStore.hash_groups(
+            self.dfBuildings, Labels.ALL_BUILDINGS_NUMBER_LABEL)
+        self.earthquake_check_hashes = ResultStore.hash_groups(
+            self.dfEarthquakeCheck, Labels.NUMBER_LABEL)
+        self.maintenance_hashes = ResultStore.hash_groups(
+            self.dfMaintenance, Labels.NUMBER_LABEL)
 
         # check how many bridges we find in the other sheets
         # bridgeInAllBuildings = 0
@@ -208,69 +342,58 @@ class KUBA:
         # convert to GeoDataFrame
         self.progress_bar.update_progress(
             description=_('Converting points to GeoDataFrames'))
-        bridge_points = []
-        for i in dfBridges.index:
-            x = dfBridges[Labels.X_LABEL][i]
-            y = dfBridges[Labels.Y_LABEL][i]
-            bridge_points.append(Point(x, y))
-        self.bridges = gpd.GeoDataFrame(
-            dfBridges, geometry=bridge_points, crs='EPSG:2056')
-
-        support_structure_points = []
-        for i in self.df_support_structures.index:
-            x = self.df_support_structures[Labels.SUPPORT_X_LABEL][i]
-            y = self.df_support_structures[Labels.SUPPORT_Y_LABEL][i]
-            support_structure_points.append(Point(x, y))
-        self.support_structures = gpd.GeoDataFrame(
-            self.df_support_structures, geometry=support_structure_points,
-            crs='EPSG:2056')
-
-        self.progress_bar.update_progress(
-            description=_('Loading earthquake zones'))
-        self.earthquake_zones = gpd.read_file(
-            "zip://data/erdbebenzonen.zip!Erdbebenzonen")
-
-        self.progress_bar.update_progress(
-            description=_('Loading precipitation zones'))
-        self.precipitation_zones = gpd.read_file(
-            "zip://data/niederschlag.zip!niederschlag")
-
-        # Leaflet always works in EPSG:4326
-        # therefore we have to convert the CRS here
-        self.progress_bar.update_progress(
-            description=_('Converting coordinate reference systems'))
-        self.bridges.to_crs('EPSG:4326', inplace=True)
-        self.support_structures.to_crs('EPSG:4326', inplace=True)
-        self.earthquake_zones.to_crs(crs="EPSG:4326", inplace=True)
-        self.precipitation_zones.to_crs(crs="EPSG:4326", inplace=True)
-
-        earthquake_zones_choropleth = (
-            InteractiveMap.create_earthquake_zones_choropleth(
-                self.earthquake_zones))
-        precipitation_zones_choropleth = (
-            InteractiveMap.create_precipitation_zones_choropleth(
-                self.precipitation_zones))
+        if not self.streaming:
+            self.__set_bridges(kuba_sheets[bridges_sheet_name])
+            self.df_support_structures = inputs['support_structures'][
+                support_structures_sheet_name]
+            self.__set_support_structures(self.df_support_structures)
+
+        # one tile layer or one choropleth per level of detail, the maps
+        # switch between them when zooming (only the coarsest choropleth is
+        # created now, the finer ones when they are shown for the first time)
+        if earthquake_zone_tiles is None:
+            earthquake_zones_choropleths = KUBA.__get_zone_choropleths(
+                inputs['earthquake_zones_display'],
+                InteractiveMap.create_earthquake_zones_choropleth)
+        else:
+            earthquake_zones_choropleths = {
+                0: InteractiveMap.create_zone_tile_layer(
+                    ZoneTiles.EARTHQUAKE_ZONES_DIRECTORY,
+                    earthquake_zone_tiles, _('Earthquake zones'))}
+        if precipitation_zone_tiles is None:
+            precipitation_zones_choropleths = KUBA.__get_zone_choropleths(
+                inputs['precipitation_zones_display'],
+                InteractiveMap.create_precipitation_zones_choropleth)
+        else:
+            precipitation_zones_choropleths = {
+                0: InteractiveMap.create_zone_tile_layer(
+                    ZoneTiles.PRECIPITATION_ZONES_DIRECTORY,
+                    precipitation_zone_tiles, _('Precipitation zones'))}
 
         self.bridges_poc_map = InteractiveMap(
-            self.progress_bar, earthquake_zones_choropleth,
-            precipitation_zones_choropleth, _('Probability of collapse'), True)
+            self.progress_bar, earthquake_zones_choropleths,
+            precipitation_zones_choropleths, _('Probability of collapse'),
+            True)
 
         self.bridges_risk_map = InteractiveMap(
-            self.progress_bar, earthquake_zones_choropleth,
-            precipitation_zones_choropleth, _('Risk'), False)
+            self.progress_bar, earthquake_zones_choropleths,
+            precipitation_zones_choropleths, _('Risk'), False)
 
         self.bridges_table = InteractiveBridgesTable()
+        # the points of the bridges in the table (for the earthquake
+        # scenarios)
+        self.bridge_table_points = []
 
         self.bridge_plots = BridgePlots()
 
         self.support_structures_poc_map = InteractiveMap(
-            self.progress_bar, earthquake_zones_choropleth,
-            precipitation_zones_choropleth, _('Probability of collapse'),
+            self.progress_bar, earthquake_zones_choropleths,
+            precipitation_zones_choropleths, _('Probability of collapse'),
             False)
 
         self.support_structures_risk_map = InteractiveMap(
-            self.progress_bar, earthquake_zones_choropleth,
-            precipitation_zones_choropleth, _('Risk'), False)
+            self.progress_bar, earthquake_zones_choropleths,
+            precipitation_zones_choropleths, _('Risk'), False)
 
         self.support_structures_table = InteractiveSupportStructuresTable()
 
@@ -278,18 +401,21 @@ class KUBA:
 
         initialWidthStyle = {'description_width': 'initial'}
 
+        # in streaming mode the number of bridges is only known after loading
+        number_of_bridges = 1 if self.streaming else self.bridges.index.stop
+
         self.bridgesIntText = widgets.BoundedIntText(
             description=_('Number of bridges'),
             min=1,
-            max=self.bridges.index.stop,
+            max=number_of_bridges,
             layout=widgets.Layout(flex='0 0 auto', width='auto'),
             style=initialWidthStyle
         )
 
         self.bridgesSlider = widgets.IntSlider(
-            value=self.bridges.index.stop,
+            value=number_of_bridges,
             min=1,
-            max=self.bridges.index.stop,
+            max=number_of_bridges,
             style=initialWidthStyle,
             layout=widgets.Layout(
                 flex='1 1 auto',
@@ -332,8 +458,6 @@ class KUBA:
 
     def loadBridges(self):
 
-        self.new_earthquake_zones_dict = len(self.earthquake_zones_dict) == 0
-
         try:
             self.bridgesSlider.disabled = True
             self.bridgesIntText.disabled = True
@@ -343,17 +467,27 @@ class KUBA:
             self.progress_bar_value = 0
             self.bridgesWithoutCoordinates = 0
             self.last_bridges_progress_bar_update = 0
+            maps_displayed = False
 
-            for i in range(0, self.bridgesSlider.value):
-                self.__load_bridge(i)
+            if self.streaming:
+                maps_displayed = self.__stream_bridges()
+            else:
+                self.__assign_bridge_zones()
+                for i in range(0, self.bridgesSlider.value):
+                    self.__load_bridge(i)
 
             # final update of the progress bar
             self.__update_bridges_progress_bar()
 
-            # save earthquake_zones_dict if just created
-            if self.new_earthquake_zones_dict:
-                with open(earthquake_zones_dict_file_name, 'w') as file:
-                    json.dump(self.earthquake_zones_dict, file, indent=4)
+            # results of removed bridges are only dropped if we loaded all
+            # bridges
+            self.bridge_results.save(
+                self.bridgesSlider.value == self.bridgesSlider.max)
+
+            # save the zones of new bridges (zones of removed bridges are
+            # only dropped if we loaded all bridges)
+            self.earthquake_zone_cache.save(
+                self.bridgesSlider.value == self.bridgesSlider.max)
 
             self.progress_bar.reset(3)
             description = (
@@ -368,8 +502,9 @@ class KUBA:
                 self.bridges_table.data_frame)
 
             with self.output:
-                self.bridges_poc_map.display()
-                self.bridges_risk_map.display()
+                if not maps_displayed:
+                    self.bridges_poc_map.display()
+                    self.bridges_risk_map.display()
                 description = _('Loading the table of bridges')
                 self.progress_bar.update_progress(
                     step=2, description=description)
@@ -387,24 +522,52 @@ class KUBA:
 
     def load_support_structures(self):
 
-        self.progress_bar.reset(len(self.support_structures))
+        if self.streaming:
+            row_count, chunks = WorkbookLoader.stream_sheet(
+                support_structures_file_name, support_structures_sheet_name,
+                self.label_columns, streaming_chunk_size)
+            # the number of rows stored in the workbook is only an estimate
+            self.number_of_support_structures = row_count or 0
+        else:
+            chunks = [self.support_structures]
+            self.number_of_support_structures = len(self.support_structures)
+
+        self.progress_bar.reset(self.number_of_support_structures)
         self.progress_bar_value = 0
         self.last_support_structures_progress_bar_update = 0
+        maps_displayed = False
 
-        self.new_precipitation_zones_dict = (
-            len(self.precipitation_zones_dict) == 0)
+        update_progress_bar = (
+            self.__update_support_structures_progress_bar_after_timeout)
 
         try:
 
-            for i in range(0, len(self.support_structures)):
-                self.__load_support_structure(i)
-                self.progress_bar_value += 1
-                self.__update_support_structures_progress_bar_after_timeout()
-
-            # save precipitation_zones_dict if just created
-            if self.new_precipitation_zones_dict:
-                with open(precipitation_zones_dict_file_name, 'w') as file:
-                    json.dump(self.precipitation_zones_dict, file, indent=4)
+            for chunk in chunks:
+                if self.streaming:
+                    self.__set_support_structures(chunk)
+                    self.number_of_support_structures = max(
+                        self.number_of_support_structures,
+                        self.support_structures.index.stop)
+                self.__assign_support_structure_zones()
+                for i in self.support_structures.index:
+                    self.__load_support_structure(i)
+                    self.progress_bar_value += 1
+                    update_progress_bar()
+                if self.streaming:
+                    # show the results of all chunks processed so far
+                    maps_displayed = self.__update_maps(
+                        self.support_structures_poc_map,
+                        self.support_structures_risk_map,
+                        self.support_structures_table.data_frame,
+                        maps_displayed)
+
+            # the estimated number of rows may have been too large
+            self.number_of_support_structures = self.progress_bar_value
+
+            self.support_structure_results.save()
+
+            # save the zones of new support structures
+            self.precipitation_zone_cache.save()
 
             self.progress_bar.reset(3)
             description = (
@@ -419,8 +582,9 @@ class KUBA:
                 self.support_structures_table.data_frame)
 
             with self.output:
-                self.support_structures_poc_map.display()
-                self.support_structures_risk_map.display()
+                if not maps_displayed:
+                    self.support_structures_poc_map.display()
+                    self.support_structures_risk_map.display()
                 description = _('Loading the table of support structures')
                 self.progress_bar.update_progress(
                     step=2, description=description)
@@ -432,6 +596,276 @@ class KUBA:
             with self.output:
                 print(traceback.format_exc())
 
+    def get_bridge_index(self) -> StructureIndex:
+        """Returns the spatial index of all bridges.
+
+        Returns
+        -------
+        StructureIndex
+            The index or None in streaming mode (only a part of the bridges
+            is kept in memory)
+        """
+        if self.streaming:
+            return None
+        if self.bridge_index is None:
+            self.bridge_index = StructureIndex.get(
+                self.bridges, bridge_index_file_name,
+                KUBA.__hash_data(self.bridge_row_hashes))
+        return self.bridge_index
+
+    def get_support_structure_index(self) -> StructureIndex:
+        """Returns the spatial index of all support structures.
+
+        Returns
+        -------
+        StructureIndex
+            The index or None in streaming mode (only a part of the support
+            structures is kept in memory)
+        """
+        if self.streaming:
+            return None
+        if self.support_structure_index is None:
+            self.support_structure_index = StructureIndex.get(
+                self.support_structures, support_structure_index_file_name,
+                KUBA.__hash_data(self.support_structure_row_hashes))
+        return self.support_structure_index
+
+    def get_unmapped_axes(self) -> pd.DataFrame:
+        """Returns the axes of the structures without traffic data.
+
+        These are the axes that could not be resolved to an axis of the
+        traffic bulletin and the axes that were resolved to an axis without
+        (complete) data in the bulletin. The structures on these axes are
+        calculated with the default traffic (see TrafficTable).
+
+        Returns
+        -------
+        pandas.DataFrame
+            The number of bridges and support structures of every axis
+            (with its traffic axis, if resolved) or None in streaming mode
+            (only a part of the structures is kept in memory)
+        """
+        if self.streaming:
+            return None
+        axes_with_data = self.traffic_table.get_axes_with_data()
+        counts = pd.concat(
+            [AxisResolver.get_unmapped(self.bridges[Labels.AXIS_LABEL],
+                                       self.bridge_traffic_axes,
+                                       axes_with_data),
+             AxisResolver.get_unmapped(
+                 self.support_structures[Labels.AXIS_LABEL],
+                 self.support_structure_traffic_axes,
+                 axes_with_data)],
+            axis=1, keys=[_('Bridges'), _('Support structures')])
+        counts = counts.fillna(0).astype('int64')
+        counts.index.names = [_('Axis'), _('Traffic axis')]
+        return counts.sort_values(
+            list(counts.columns), ascending=False, kind='stable')
+
+    def get_earthquake_scenarios(self) -> EarthquakeScenarios:
+        """Returns the earthquake scenarios of all loaded bridges.
+
+        Returns
+        -------
+        EarthquakeScenarios
+            The scenarios of the bridges in the table of bridges or None if
+            no bridges were loaded yet
+        """
+        data_frame = self.bridges_table.data_frame
+        if data_frame is None:
+            return None
+        return EarthquakeScenarios(
+            gpd.GeoSeries(self.bridge_table_points, crs=Coordinates.LV95),
+            data_frame[_('Probability of collapse')],
+            data_frame[_('Damage costs')],
+            data_frame[_('Axis')],
+            data_frame[_('Earthquake zone')])
+
+    @staticmethod
+    def __create_lookup(data_frame, number_label, value_label):
+        # maps every structure number to the value of its first row
+        rows = data_frame[data_frame[number_label].notna()]
+        rows = rows.drop_duplicates(number_label, keep='first')
+        return dict(zip(rows[number_label], rows[value_label]))
+
+    @staticmethod
+    def __get_zone_choropleths(zones_per_level, create_choropleth):
+        # creates the choropleth of the coarsest level of detail, the finer
+        # levels get a function that creates their choropleth
+        # (see InteractiveMap)
+        coarsest_level = min(zones_per_level)
+        return {
+            level: (create_choropleth(zones) if level == coarsest_level
+                    else partial(create_choropleth, zones))
+            for level, zones in zones_per_level.items()}
+
+    @staticmethod
+    def __hash_data(row_hashes):
+        return hashlib.sha256(row_hashes.to_numpy().tobytes()).hexdigest()
+
+    def __stream_bridges(self):
+        # Processes the bridges chunk by chunk while the sheet is read and
+        # shows the maps with the results of the chunks processed so far.
+        # The first time all bridges are loaded, later only the number of
+        # bridges selected with the slider.
+        if self.bridges is None:
+            number_of_bridges = None
+        else:
+            number_of_bridges = self.bridgesSlider.value
+        row_count, chunks = WorkbookLoader.stream_sheet(
+            kuba_file_name, bridges_sheet_name, self.label_columns,
+            streaming_chunk_size)
+        if number_of_bridges is None and row_count:
+            # the number of rows stored in the workbook is only an estimate
+            self.bridgesSlider.max = row_count
+            self.bridgesSlider.value = row_count
+            self.progress_bar.reset(row_count)
+
+        maps_displayed = False
+        for chunk in chunks:
+            if number_of_bridges is not None:
+                chunk = chunk.loc[chunk.index < number_of_bridges]
+                if chunk.empty:
+                    break
+            self.__set_bridges(chunk)
+            self.__assign_bridge_zones()
+            for i in self.bridges.index:
+                self.__load_bridge(i)
+            maps_displayed = self.__update_maps(
+                self.bridges_poc_map, self.bridges_risk_map,
+                self.bridges_table.data_frame, maps_displayed)
+
+        if number_of_bridges is None and self.bridges is not None:
+            # now we know the real number of bridges
+            self.bridgesSlider.max = max(1, self.bridges.index.stop)
+            self.bridgesSlider.value = self.bridgesSlider.max
+        self.updateReadout()
+        return maps_displayed
+
+    def __update_maps(self, poc_map, risk_map, values, maps_displayed):
+        # updates the marker layers of both maps with the values of all
+        # entries processed so far and displays the maps (only once)
+        if values is None:
+            return maps_displayed
+        poc_map.add_marker_layer(values)
+        risk_map.add_marker_layer(values)
+        if not maps_displayed:
+            with self.output:
+                poc_map.display()
+                risk_map.display()
+        return True
+
+    def __set_bridges(self, data_frame):
+        self.bridge_row_hashes = ResultStore.hash_rows(data_frame)
+        self.bridges = KUBA.__create_geo_data_frame(
+            data_frame, Labels.X_LABEL, Labels.Y_LABEL)
+        self.bridge_traffic_axes = self.axis_resolver.resolve(
+            self.bridges[Labels.AXIS_LABEL])
+        self.bridge_display_points = None
+        self.bridge_zones = None
+        self.bridge_factors = None
+        self.bridge_index = None
+
+    def __assign_bridge_zones(self):
+        # assigns the earthquake zones of all bridges, bridges that are not
+        # in the cache yet are assigned in one spatial join
+        if self.bridge_zones is None:
+            self.bridge_zones = self.earthquake_zone_cache.get_zones(
+                self.bridges[Labels.NUMBER_LABEL], self.bridges.geometry,
+                self.__calculate_earthquake_zones)
+
+    def __assign_support_structure_zones(self):
+        # assigns the precipitation zones of all support structures
+        self.support_structure_zones = (
+            self.precipitation_zone_cache.get_zones(
+                self.support_structures[self.support_number_label],
+                self.support_structures.geometry,
+                self.__calculate_precipitation_zones))
+
+    def __calculate_earthquake_zones(self, points):
+        def calculate(points):
+            return ZoneLayers.get_earthquake_zones(
+                self.earthquake_zones, points)
+        if self.earthquake_zone_raster is None:
+            return calculate(points)
+        return self.earthquake_zone_raster.lookup(points, calculate)
+
+    def __calculate_precipitation_zones(self, points):
+        def calculate(points):
+            return ZoneLayers.get_precipitation_zones(
+                self.precipitation_zones, points)
+        if self.precipitation_zone_raster is None:
+            return calculate(points)
+        return self.precipitation_zone_raster.lookup(points, calculate)
+
+    def __set_support_structures(self, data_frame):
+        self.support_structure_row_hashes = ResultStore.hash_rows(data_frame)
+        # the support structures are identified by their number (if the
+        # sheet has one) or by their name
+        self.support_number_label = next(
+            (label for label in (Labels.ALL_BUILDINGS_NUMBER_LABEL,
+                                 Labels.NUMBER_LABEL)
+             if label in data_frame.columns),
+            Labels.NAME_LABEL)
+        self.support_structures = KUBA.__create_geo_data_frame(
+            data_frame, Labels.SUPPORT_X_LABEL, Labels.SUPPORT_Y_LABEL)
+        self.support_structure_traffic_axes = self.axis_resolver.resolve(
+            self.support_structures[Labels.AXIS_LABEL])
+        self.support_structure_display_points = None
+        self.support_structure_index = None
+
+    @staticmethod
+    def __create_geo_data_frame(data_frame, x_label, y_label):
+        # creates a GeoDataFrame from the Swiss coordinates (LV95)
+        # all calculations are done in LV95 (metric), only the maps need
+        # EPSG:4326 (see __get_display_point())
+        points = Coordinates.create_points(
+            data_frame[x_label], data_frame[y_label],
+            target_crs=Coordinates.LV95)
+        return gpd.GeoDataFrame(
+            data_frame, geometry=points, crs=Coordinates.LV95)
+
+    @staticmethod
+    def __get_display_points(structures):
+        # Leaflet always works in EPSG:4326, therefore we convert the points
+        # of all structures in bulk (but only when the maps need them)
+        return pd.Series(
+            Coordinates.to_wgs84(structures.geometry.values),
+            index=structures.index)
+
+    def __get_bridge_factors(self):
+        # the factors and probabilities of collapse of all bridges are
+        # calculated column-wise (but only when a bridge has to be
+        # calculated)
+        if self.bridge_factors is None:
+            self.__assign_bridge_zones()
+            self.bridge_factors = BridgeRisks.calculate(
+                self.bridges, self.bridge_zones, self.overpass_functions,
+                self.skews, self.earthquake_checks)
+        return self.bridge_factors
+
+    @staticmethod
+    def __get_optional_int(value):
+        return None if math.isnan(value) else int(value)
+
+    @staticmethod
+    def __get_number(value):
+        # integral factors are shown without decimals (e.g. "9" instead of
+        # "9.0"), like before the factors were calculated in bulk
+        return int(value) if float(value).is_integer() else float(value)
+
+    def __get_bridge_display_point(self, i):
+        if self.bridge_display_points is None:
+            self.bridge_display_points = KUBA.__get_display_points(
+                self.bridges)
+        return self.bridge_display_points[i]
+
+    def __get_support_structure_display_point(self, i):
+        if self.support_structure_display_points is None:
+            self.support_structure_display_points = (
+                KUBA.__get_display_points(self.support_structures))
+        return self.support_structure_display_points[i]
+
     def __load_support_structure(self, i):
 
         point = self.support_structures['geometry'][i]
@@ -450,6 +884,38 @@ class KUBA:
                 type_text != 'Stützmaueranlage'):
             return
 
+        display_point = self.__get_support_structure_display_point(i)
+
+        # reuse the results of the last run if the inputs didn't change
+        number = str(self.support_structures[self.support_number_label][i])
+        input_hash = str(self.support_structure_row_hashes[i])
+        results = self.support_structure_results.get(number, input_hash)
+        if results is None:
+            results = self.__calculate_support_structure(i)
+            self.support_structure_results.put(number, input_hash, results)
+
+        try:
+            # add marker to interactive map
+            popup = InteractiveMap.create_support_structure_popup(
+                *results['popup'])
+            self.support_structures_poc_map.add_marker(display_point, popup)
+            self.support_structures_risk_map.add_marker(display_point, popup)
+
+            # add dataframe to interactive table
+            # (the table has the same columns as the popup)
+            self.support_structures_table.add_entry(*results['popup'])
+
+            # add data to plots
+            self.support_structures_plots.fillData(i, *results['plots'])
+
+        except Exception:
+            print(traceback.format_exc())
+            with self.output:
+                print(traceback.format_exc())
+                print('results:', results)
+
+    def __calculate_support_structure(self, i):
+
         support_structure_name = str(
             self.support_structures[Labels.NAME_LABEL][i])
 
@@ -504,21 +970,9 @@ class KUBA:
         grade_factor = 2.0
 
         # K_17
-        precipitation_zone_value = None
-        if self.new_precipitation_zones_dict:
-            precipitation_zone = self.precipitation_zones[
-                self.precipitation_zones.contains(point)]['DN']
-            if precipitation_zone.empty:
-                # support structures outside of known precipitation_zones
-                precipitation_zone_factor = 1.5
-            else:
-                precipitation_zone_value = int(precipitation_zone.iloc[0])
-                self.precipitation_zones_dict[
-                    str(point.x) + ' ' + str(point.y)] = (
-                        precipitation_zone_value)
-        else:
-            precipitation_zone_value = self.precipitation_zones_dict[
-                str(point.x) + ' ' + str(point.y)]
+        # (the zones of all support structures were assigned in bulk, see
+        # __assign_support_structure_zones())
+        precipitation_zone_value = self.support_structure_zones[i]
 
         if precipitation_zone_value is None:
             # support structures outside of known precipitation_zones
@@ -566,8 +1020,8 @@ class KUBA:
         width = self.support_structures[Labels.SUPPORT_WIDTH_LABEL][i]
 
         kuba_axis = self.support_structures[Labels.AXIS_LABEL][i]
-        traffic_axis, aadt, percentage_of_cars = (
-            self.__get_traffic_data(kuba_axis))
+        traffic_axis, aadt, percentage_of_cars = self.__get_traffic_data(
+            self.support_structure_traffic_axes[i])
 
         consequence_of_collapse = self.support_structures[
             Labels.SUPPORT_CONSEQUENCE_OF_COLLAPSE][i]
@@ -599,22 +1053,9 @@ class KUBA:
             _('unknown') if not isinstance(material_text, str)
             else material_text)
 
-        try:
-            # add marker to interactive map
-            popup = InteractiveMap.create_support_structure_popup(
-                support_structure_name, year_of_construction,
-                human_error_factor, condition_class, condition_class_factor,
-                type_factor, wall_type, material_factor, visible_area,
-                visible_area_factor, max_height, height_factor,
-                precipitation_zone_value, precipitation_zone_factor,
-                probability_of_collapse, length, width, replacement_costs,
-                victim_costs, axis_string, aadt, vehicle_lost_costs,
-                downtime_costs, damage_costs, risk)
-            self.support_structures_poc_map.add_marker(point, popup)
-            self.support_structures_risk_map.add_marker(point, popup)
-
-            # add dataframe to interactive table
-            self.support_structures_table.add_entry(
+        # the arguments for the popup (and the table) and the plots
+        return {
+            'popup': (
                 support_structure_name, year_of_construction,
                 human_error_factor, condition_class, condition_class_factor,
                 type_factor, wall_type, material_factor, visible_area,
@@ -622,33 +1063,14 @@ class KUBA:
                 precipitation_zone_value, precipitation_zone_factor,
                 probability_of_collapse, length, width, replacement_costs,
                 victim_costs, axis_string, aadt, vehicle_lost_costs,
-                downtime_costs, damage_costs, risk)
-
-            # add data to plots
-            self.support_structures_plots.fillData(
-                i, condition_class, probability_of_collapse, age,
+                downtime_costs, damage_costs, risk),
+            # the plots get the index of the support structure as first
+            # argument
+            'plots': (
+                condition_class, probability_of_collapse, age,
                 length, max_height, building_material_string, aadt, risk,
                 damage_costs, vehicle_lost_costs, replacement_costs,
-                downtime_costs, victim_costs)
-
-        except Exception:
-            print(traceback.format_exc())
-            with self.output:
-                print(traceback.format_exc())
-                print('support_structure_name:', support_structure_name)
-                print('year_of_construction:', year_of_construction)
-                print('human_error_factor:', human_error_factor)
-                print('condition_class:', condition_class)
-                print('condition_class_factor:', condition_class_factor)
-                print('type_factor:', type_factor)
-                print('wall_type:', wall_type)
-                print('material_factor:', material_factor)
-                print('visible_area:', visible_area)
-                print('visible_area_factor:', visible_area_factor)
-                print('max_height:', max_height)
-                print('height_factor:', height_factor)
-                print('age:', age)
-                print('risk:', risk)
+                downtime_costs, victim_costs)}
 
     def __load_bridge(self, i):
         point = self.bridges['geometry'][i]
@@ -660,152 +1082,102 @@ class KUBA:
 
         self.progress_bar_value += 1
 
+        display_point = self.__get_bridge_display_point(i)
+
+        # reuse the results of the last run if the inputs didn't change
+        bridge_number = str(self.bridges[Labels.NUMBER_LABEL][i])
+        input_hash = self.__get_bridge_input_hash(i, bridge_number)
+        results = self.bridge_results.get(bridge_number, input_hash)
+        if results is None:
+            results = self.__calculate_bridge(i)
+            self.bridge_results.put(bridge_number, input_hash, results)
+
+        # add new marker to interactive maps
+        bridge_popup = InteractiveMap.create_bridge_popup(*results['popup'])
+        self.bridges_poc_map.add_marker(display_point, bridge_popup)
+        self.bridges_risk_map.add_marker(display_point, bridge_popup)
+
+        # add dataframe to interactive table
+        self.bridges_table.add_entry(*results['table'])
+        self.bridge_table_points.append(point)
+
+        # add data to plots
+        self.bridge_plots.fillData(i, *results['plots'])
+
+        self.__update_bridges_progress_bar_after_timeout()
+
+    def __get_bridge_input_hash(self, i, bridge_number):
+        # the hash of the row of the bridge and all related rows in the other
+        # sheets
+        return hashlib.sha256(repr((
+            self.bridge_row_hashes[i],
+            self.building_hashes.get(bridge_number),
+            self.earthquake_check_hashes.get(bridge_number),
+            self.maintenance_hashes.get(bridge_number))).encode()).hexdigest()
+
+    def __calculate_bridge(self, i):
         bridgeName = str(self.bridges[Labels.NAME_LABEL][i])
 
+        # the factors of all bridges were calculated in bulk
+        # (see __get_bridge_factors())
+        factors = self.__get_bridge_factors()
+
         # K_1
-        normYear = BridgeRisks.getNormYear(
-            self.bridges[Labels.NORM_YEAR_LABEL][i])
+        normYear = KUBA.__get_optional_int(factors['norm_year'][i])
         year_of_construction = self.bridges[
             Labels.YEAR_OF_CONSTRUCTION_LABEL][i]
         if not math.isnan(year_of_construction):
             year_of_construction = int(year_of_construction)
-        humanErrorFactor = BridgeRisks.getHumanErrorFactor(
-            normYear, year_of_construction)
+        humanErrorFactor = KUBA.__get_number(factors['human_error_factor'][i])
 
         # K_3
-        typeCode = self.bridges[Labels.TYPE_CODE_LABEL][i]
         typeText = self.bridges[Labels.TYPE_TEXT_LABEL][i]
+        staticalDeterminacyFactor = factors['statical_determinacy_factor'][i]
         staticalDeterminacyFactor = (
-            BridgeRisks.getStaticalDeterminacyFactor(typeCode))
+            None if math.isnan(staticalDeterminacyFactor)
+            else KUBA.__get_number(staticalDeterminacyFactor))
 
         # P_f * K_4
         conditionClass = self.bridges[Labels.CONDITION_CLASS_LABEL][i]
-        age = BridgeRisks.getAge(year_of_construction)
-        conditionFactor = BridgeRisks.getConditionFactor(conditionClass, age)
+        age = KUBA.__get_optional_int(factors['age'][i])
+        conditionFactor = KUBA.__get_number(factors['condition_factor'][i])
 
         # K_6
         bridgeNumber = self.bridges[Labels.NUMBER_LABEL][i]
-        building = self.dfBuildings[
-            (self.dfBuildings[Labels.ALL_BUILDINGS_NUMBER_LABEL]
-             == bridgeNumber) &
-            (self.dfBuildings[Labels.FUNCTION_LABEL]
-             .str.startswith('Überquert'))]
-        if building.empty:
-            functionText = None
-        else:
-            functionText = building[Labels.FUNCTION_LABEL].iat[0]
-        overpassFactor = BridgeRisks.getOverpassFactor(functionText)
+        functionText = self.overpass_functions.get(bridgeNumber)
+        overpassFactor = KUBA.__get_number(factors['overpass_factor'][i])
         if functionText is None:
             functionText = _('unknown')
 
         # K_7
-        # The dataset is is quite chaotic. There are bridges where
-        # the span is smaller than the largest span,
-        # e.g. N13 154, Averserrhein Brücke.
-        # Therefore we use the following fallback strategy:
-        # We start with the largest span.
-        span = BridgeRisks.getSpan(self.bridges[Labels.LARGEST_SPAN_LABEL][i])
-        if span is None:
-            # If the largest span is unknown, use the span.
-            span = BridgeRisks.getSpan(self.bridges[Labels.SPAN_LABEL][i])
-            if span is None:
-                # If the span is unknown, use the length.
-                span = BridgeRisks.getSpan(
-                    self.bridges[Labels.LENGTH_LABEL][i])
-                if span is None:
-                    # If the length is unknown, assume 25 m.
-                    span = 25
-        staticCalculationFactor = BridgeRisks.getStaticCalculationFactor(span)
+        span = factors['span'][i]
+        span = None if math.isnan(span) else KUBA.__get_number(span)
+        staticCalculationFactor = KUBA.__get_number(
+            factors['static_calculation_factor'][i])
 
         # K_8
-        bridgeTypeFactor = BridgeRisks.getBridgeTypeFactor(typeCode)
+        bridgeTypeFactor = KUBA.__get_number(factors['bridge_type_factor'][i])
 
         # K_9
-        materialCode = BridgeRisks.getMaterialCode(
-            self.bridges[Labels.MATERIAL_CODE_LABEL][i])
         material_text = self.bridges[Labels.MATERIAL_TEXT_LABEL][i]
-        materialFactor = BridgeRisks.getMaterialFactor(materialCode)
+        materialFactor = KUBA.__get_number(factors['material_factor'][i])
         building_material_string = (
             _('unknown') if not isinstance(material_text, str)
             else material_text)
 
         # K_11
-        robustness_factor = BridgeRisks.getRobustnessFactor(
-            year_of_construction)
+        robustness_factor = KUBA.__get_number(factors['robustness_factor'][i])
 
         # K_13
-        if self.new_earthquake_zones_dict:
-            zone = self.earthquake_zones[
-                self.earthquake_zones.contains(point)]['ZONE']
-            if zone.empty:
-                # The earthquake zones don't cover bodies of water.
-                # Therefore we have some coordinates of bridges
-                # outside of any earthquake zone.
-                # Our workaround is to create a 1000 m circle
-                # around the coordinates of the bridge to find an
-                # intersecting earthquake zone (1000m should be
-                # large enough to catch all such cases).
-                circle = gpd.GeoDataFrame(
-                    {'geometry': [point]}, crs='EPSG:4326')
-                # map to CRS 'EPSG:3857', so that we can give the
-                # parameter to buffer() below in meters
-                circle.to_crs('EPSG:3857', inplace=True)
-                circle.geometry = circle.buffer(1000)
-                # map back to the Leaflet default of EPSG:4326
-                circle = circle.to_crs('EPSG:4326')
-                intersections = self.earthquake_zones.intersects(
-                    circle.iloc[0, 0])
-                zone = self.earthquake_zones[intersections]['ZONE']
-            if zone.empty:
-                zoneName = _("none")
-            else:
-                zoneName = zone.iloc[0]
-            self.earthquake_zones_dict[
-                str(point.x) + ' ' + str(point.y)] = zoneName
-        else:
-            zoneName = self.earthquake_zones_dict[
-                str(point.x) + ' ' + str(point.y)]
-
-        earthQuakeCheckEntry = self.dfEarthquakeCheck[
-            self.dfEarthquakeCheck[Labels.NUMBER_LABEL] == bridgeNumber]
-        if earthQuakeCheckEntry.empty:
-            earthQuakeCheckValue = False
-        else:
-            earthQuakeCheckValue = earthQuakeCheckEntry[
-                Labels.EARTHQUAKE_CHECK_LABEL].iloc[0]
-
-        skewEntry = self.dfBuildings[
-            self.dfBuildings[Labels.ALL_BUILDINGS_NUMBER_LABEL]
-            == bridgeNumber]
-        if skewEntry.empty:
-            skewValue = None
-        else:
-            skewValue = skewEntry[Labels.SKEW_LABEL].iloc[0]
+        # (the zones of all bridges were assigned in bulk, see
+        # __assign_bridge_zones())
+        zoneName = self.bridge_zones[i]
+        if zoneName is None:
+            zoneName = _("none")
+        earthQuakeZoneFactor = KUBA.__get_number(
+            factors['earthquake_zone_factor'][i])
 
-        earthQuakeZoneFactor = BridgeRisks.getEarthQuakeZoneFactor(
-            earthQuakeCheckValue, typeCode, bridgeName, skewValue,
-            zoneName, year_of_construction)
-
-        probability_of_collapse = (
-            (1 if humanErrorFactor is None
-                else humanErrorFactor) *
-            (1 if staticalDeterminacyFactor is None
-                else staticalDeterminacyFactor) *
-            (1 if conditionFactor is None
-                else conditionFactor) *
-            (1 if overpassFactor is None
-                else overpassFactor) *
-            (1 if staticCalculationFactor is None
-                else staticCalculationFactor) *
-            (1 if bridgeTypeFactor is None
-                else bridgeTypeFactor) *
-            (1 if materialFactor is None
-                else materialFactor) *
-            (1 if robustness_factor is None
-                else robustness_factor) *
-            (1 if earthQuakeZoneFactor is None
-                else earthQuakeZoneFactor)
-            )
+        probability_of_collapse = factors['probability_of_collapse'][i]
 
         if age is None:
             ageText = _('unknown')
@@ -832,14 +1204,11 @@ class KUBA:
         # We ignore entries with such a silly date.
         silly_date = datetime(1900, 1, 1, 0, 0)
 
-        maintenanceAcceptanceDate = None
         maintenanceAcceptanceDateString = _('unknown')
-        maintenance = self.dfMaintenance[
-            self.dfMaintenance[Labels.NUMBER_LABEL] == bridgeNumber]
-        if not maintenance.empty:
-            maintenanceAcceptanceDate = maintenance[
-                Labels.MAINTENANCE_ACCEPTANCE_DATE_LABEL].iloc[0]
-            if (isinstance(maintenanceAcceptanceDate, datetime) and
+        maintenanceAcceptanceDate = self.maintenance_acceptance_dates.get(
+            bridgeNumber)
+        if maintenanceAcceptanceDate is not None:
+            if (pd.notna(maintenanceAcceptanceDate) and
                     (maintenanceAcceptanceDate != silly_date)):
                 maintenanceAcceptanceDateString = format_date(
                     maintenanceAcceptanceDate)
@@ -848,8 +1217,8 @@ class KUBA:
 
         # get AADT (average annual daily traffic) and percentages
         kuba_axis = self.bridges[Labels.AXIS_LABEL][i]
-        traffic_axis, aadt, percentage_of_cars = (
-            self.__get_traffic_data(kuba_axis))
+        traffic_axis, aadt, percentage_of_cars = self.__get_traffic_data(
+            self.bridge_traffic_axes[i])
 
         length = self.bridges[Labels.LENGTH_LABEL][i]
         if ((length is None) or (length == 0) or (math.isnan(length))):
@@ -874,41 +1243,37 @@ class KUBA:
 
         axis_string = str(kuba_axis) + " → " + str(traffic_axis)
 
-        # add new marker to interactive maps
-        bridge_popup = InteractiveMap.create_bridge_popup(
-            bridgeName, normYearString, year_of_constructionString,
-            humanErrorFactor, typeText, staticalDeterminacyFactor, ageText,
-            conditionFactor, span, functionText, overpassFactor,
-            staticCalculationFactor, bridgeTypeFactor,
-            building_material_string, materialFactor, robustness_factor,
-            zoneName, earthQuakeZoneFactor, maintenanceAcceptanceDateString,
-            probability_of_collapse, length, width, replacement_costs,
-            victim_costs, axis_string, aadt, vehicle_lost_costs,
-            downtime_costs, damage_costs, risk)
-        self.bridges_poc_map.add_marker(point, bridge_popup)
-        self.bridges_risk_map.add_marker(point, bridge_popup)
-
-        # add dataframe to interactive table
-        self.bridges_table.add_entry(
-            bridgeName, normYearString, year_of_constructionString,
-            humanErrorFactor, typeText, staticalDeterminacyFactor,
-            conditionClass, ageText, conditionFactor, functionText, span,
-            overpassFactor, staticCalculationFactor, bridgeTypeFactor,
-            building_material_string, materialFactor, robustness_factor,
-            zoneName, earthQuakeZoneFactor, maintenanceAcceptanceDateString,
-            probability_of_collapse, length, width, replacement_costs,
-            victim_costs, axis_string, aadt, vehicle_lost_costs,
-            downtime_costs, damage_costs, risk)
-
-        # add data to plots
-        self.bridge_plots.fillData(
-            i, conditionClass, probability_of_collapse, age, span,
-            building_material_string, year_of_construction,
-            maintenanceAcceptanceDate, aadt, risk, damage_costs,
-            vehicle_lost_costs, replacement_costs, downtime_costs,
-            victim_costs)
-
-        self.__update_bridges_progress_bar_after_timeout()
+        # the arguments for the popup, the table and the plots
+        return {
+            'popup': (
+                bridgeName, normYearString, year_of_constructionString,
+                humanErrorFactor, typeText, staticalDeterminacyFactor,
+                ageText, conditionFactor, span, functionText, overpassFactor,
+                staticCalculationFactor, bridgeTypeFactor,
+                building_material_string, materialFactor, robustness_factor,
+                zoneName, earthQuakeZoneFactor,
+                maintenanceAcceptanceDateString, probability_of_collapse,
+                length, width, replacement_costs, victim_costs, axis_string,
+                aadt, vehicle_lost_costs, downtime_costs, damage_costs,
+                risk),
+            'table': (
+                bridgeName, normYearString, year_of_constructionString,
+                humanErrorFactor, typeText, staticalDeterminacyFactor,
+                conditionClass, ageText, conditionFactor, functionText, span,
+                overpassFactor, staticCalculationFactor, bridgeTypeFactor,
+                building_material_string, materialFactor, robustness_factor,
+                zoneName, earthQuakeZoneFactor,
+                maintenanceAcceptanceDateString, probability_of_collapse,
+                length, width, replacement_costs, victim_costs, axis_string,
+                aadt, vehicle_lost_costs, downtime_costs, damage_costs,
+                risk),
+            # the plots get the index of the bridge as first argument
+            'plots': (
+                conditionClass, probability_of_collapse, age, span,
+                building_material_string, year_of_construction,
+                maintenanceAcceptanceDate, aadt, risk, damage_costs,
+                vehicle_lost_costs, replacement_costs, downtime_costs,
+                victim_costs)}
 
     def __update_bridges_progress_bar_after_timeout(self):
         # updating the progressbar is a very time consuming operation
@@ -945,60 +1310,17 @@ class KUBA:
         description = (
             _('Support structures are being loaded') + ': ' +
             str(self.progress_bar_value) + '/' +
-            str(len(self.support_structures)))
+            str(self.number_of_support_structures))
         self.progress_bar.update_progress(
             step=self.progress_bar_value, description=description)
 
-    def __get_traffic_data(self, kuba_axis: str):
-        traffic_axis = self.traffic_mapping.get(kuba_axis, "")
-
-        if traffic_axis:
-            # We have two options to caclulate the mean value:
-            #   - .mean().mean(): the mean value of mean values
-            #   - .stack().mean(): the mean value of all values
-            #   What is the "better" variant?
-            dtv_lines = self.df_traffic_data[(self.df_traffic_data[
-                Labels.TRAFFIC_AXIS_LABEL] == traffic_axis)]
-            start_label = Labels.TRAFFIC_January_LABEL
-            stop_label = Labels.TRAFFIC_December_LABEL
-            # we use "axis=1" to first calculate the mean value of a certain
-            # measuring point
-            aadt = dtv_lines.loc[:, start_label:stop_label].mean(axis=1).mean()
-
-            if math.isnan(aadt):
-                # no useful data found in Bulletin
-                aadt = 5000
-                percentage_of_cars = 0.95
-
-            else:
-                # get average number of heavy duty vehicles
-                # "DTV" = "Durchschnittlicher Tagesverkehr"
-                # "DWV SV" =
-                #       "Durchschnittlicher Werktagesverkehr"
-                #       "Schwerverkehr (Klassen 1, 8, 9, 10)"
-                #  is 4 lines below the line with the "DVT" value
-                heavy_duty_offset = 4
-                aadt_indices = self.df_traffic_data[(self.df_traffic_data[
-                    Labels.TRAFFIC_AXIS_LABEL] == traffic_axis)].index
-                heavy_duty_indices = aadt_indices + heavy_duty_offset
-                heavy_duty_lines = self.df_traffic_data.iloc[
-                    heavy_duty_indices]
-                # here we use .mean().mean() again
-                heavy_duty_mean = heavy_duty_lines.loc[
-                    :, start_label:stop_label].mean(axis=1).mean()
-
-                # The average values are very wide spread!
-                # e.g. for "A 1", the minimum is 20'481, the maximum is 145'759
-                # Decision: we accept this like it is.
-                percentage_of_trucks = (heavy_duty_mean * 100) / aadt
-                percentage_of_cars = 1 - percentage_of_trucks
-
-                # convert aadt from float to the next rounded int
-                # (the values are large enough)
-                aadt = round(aadt)
-
-        else:
-            aadt = 5000
-            percentage_of_cars = 0.95
+    def __get_traffic_data(self, traffic_axis: str):
+        if pd.isna(traffic_axis):
+            # the axis of the structure could not be resolved
+            # (see get_unmapped_axes())
+            traffic_axis = ""
 
+        # the traffic of all axes was calculated only once
+        # (see TrafficTable)
+        aadt, percentage_of_cars = self.traffic_table.get(traffic_axis)
         return traffic_axis, aadt, percentage_of_cars
@@ -22,10 +22,6 @@ MAINTENANCE_ACCEPTANCE_DATE_LABEL = (
 EARTHQUAKE_CHECK_LABEL = (
     'Erdbebenbeurteilung\xa0Erfüllung\xa0Erdbebenbeurteilung')
 AXIS_LABEL = 'Achse'
-TRAFFIC_AXIS_LABEL = 'Unnamed: 4'
-TRAFFIC_January_LABEL = 'Unnamed: 6'
-TRAFFIC_December_LABEL = 'Unnamed: 17'
-TRAFFIC_AADT_LABEL = 'Unnamed: 18'
 SUPPORT_CONDITION_LABEL = 'Zustand'
 SUPPORT_X_LABEL = 'Infrastrukturobjekt\xa0Landeskoordinaten\xa0E\xa0[m]'
 SUPPORT_Y_LABEL = 'Infrastrukturobjekt\xa0Landeskoordinaten\xa0N\xa0[m]'
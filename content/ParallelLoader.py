@@ -0,0 +1,76 @@
+import os
+import sys
+from concurrent.futures import (as_completed, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from ProgressBar import ProgressBar
+
+
+class ParallelLoader:
+    """Loads independent inputs concurrently.
+
+    The inputs are loaded in a thread pool by default. The environment
+    variable KUBA_LOADER_EXECUTOR selects another executor:
+
+    - 'thread': a thread pool (default)
+    - 'process': a process pool (the functions and their arguments must be
+      picklable)
+    - 'sequential': one input after another
+
+    Pyodide doesn't support threads or processes, there the inputs are
+    always loaded one after another.
+    """
+
+    executor = os.environ.get('KUBA_LOADER_EXECUTOR', 'thread')
+
+    @staticmethod
+    def load(tasks: dict, progress_bar: ProgressBar) -> dict:
+        """Loads all inputs and waits until all of them are available.
+
+        The progress bar is updated once per input.
+
+        Parameters
+        ----------
+        tasks : dict
+            A dictionary mapping a key to a tuple of a description (shown in
+            the progress bar), a function and the arguments of the function
+        progress_bar : ProgressBar
+            The progress bar for showing the progress while loading
+
+        Returns
+        -------
+        dict
+            A dictionary mapping every key to the result of its function
+        """
+        results = {}
+
+        if sys.platform == 'emscripten' or (
+                ParallelLoader.executor == 'sequential'):
+            for key, (description, function, arguments) in tasks.items():
+                progress_bar.update_progress(description=description)
+                results[key] = function(*arguments)
+            return results
+
+        if ParallelLoader.executor == 'process':
+            executor_class = ProcessPoolExecutor
+        else:
+            executor_class = ThreadPoolExecutor
+
+        pending_tasks = dict(tasks)
+        with executor_class(max_workers=len(tasks)) as executor:
+            futures = {
+                executor.submit(function, *arguments): key
+                for key, (_, function, arguments) in tasks.items()}
+
+            # we always show the description of an input we are still
+            # waiting for
+            progress_bar.update_progress(
+                description=next(iter(pending_tasks.values()))[0])
+            for future in as_completed(futures):
+                key = futures[future]
+                results[key] = future.result()
+                del pending_tasks[key]
+                if pending_tasks:
+                    progress_bar.update_progress(
+                        description=next(iter(pending_tasks.values()))[0])
+
+        return {key: results[key] for key in tasks}
@@ -0,0 +1,147 @@
+import os
+import pandas as pd
+
+
+class ResultStore:
+    """A persistent store of the results of the risk calculations.
+
+    The results of a structure are keyed by its structure number and a hash
+    of all its inputs. When a new KUBA export is loaded, only the structures
+    whose inputs changed (and the new ones) have to be calculated again, the
+    results of all other structures are reused. Results of structures that
+    were not used in a complete run (e.g. because the structure was removed
+    from the export) are dropped when the store is saved.
+
+    Inputs that affect all structures (e.g. the traffic data or the zones)
+    are part of the context of the store. If the context changes, all stored
+    results become invalid.
+    """
+
+    # increase when the calculation or the format of the results changes
+    VERSION = 1
+
+    def __init__(self, file_name: str, context: tuple) -> None:
+        """Initialize the ResultStore and load the stored results.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file where the results are stored
+        context : tuple
+            The hashes of all inputs that affect all structures
+        """
+        self.file_name = file_name
+        self.context = (ResultStore.VERSION,) + tuple(context)
+        self.results = {}
+        self.used_results = {}
+        try:
+            if os.path.isfile(file_name):
+                stored = pd.read_pickle(file_name)
+                if stored['context'] == self.context:
+                    self.results = stored['results']
+        except Exception:
+            # a broken store is no reason to fail, we simply calculate
+            # everything again
+            pass
+
+    def get(self, number: str, input_hash: str) -> dict:
+        """Returns the stored results of a structure.
+
+        Parameters
+        ----------
+        number : str
+            The structure number
+        input_hash : str
+            The hash of all inputs of the structure
+
+        Returns
+        -------
+        dict
+            The stored results or None if the structure is unknown or its
+            inputs changed
+        """
+        key = (number, input_hash)
+        results = self.results.get(key)
+        if results is not None:
+            self.used_results[key] = results
+        return results
+
+    def put(self, number: str, input_hash: str, results: dict) -> None:
+        """Stores the results of a structure.
+
+        Parameters
+        ----------
+        number : str
+            The structure number
+        input_hash : str
+            The hash of all inputs of the structure
+        results : dict
+            The results of the calculation
+        """
+        self.used_results[(number, input_hash)] = results
+
+    def save(self, complete: bool = True) -> None:
+        """Saves the results to the file.
+
+        Parameters
+        ----------
+        complete : bool
+            If all structures of the export were processed (default is
+            True). Only then the results of structures that were not used
+            are dropped.
+        """
+        if complete:
+            results = self.used_results
+        else:
+            results = {**self.results, **self.used_results}
+        temp_file_name = self.file_name + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+            pd.to_pickle(
+                {'context': self.context, 'results': results},
+                temp_file_name)
+            os.replace(temp_file_name, self.file_name)
+        except OSError:
+            # e.g. a read-only file system, continue without store
+            pass
+        self.results = results
+        self.used_results = {}
+
+    @staticmethod
+    def hash_rows(data_frame: pd.DataFrame) -> pd.Series:
+        """Returns a hash of every row of a DataFrame.
+
+        Parameters
+        ----------
+        data_frame : pandas.DataFrame
+            The DataFrame (without geometry columns)
+
+        Returns
+        -------
+        pandas.Series
+            The hash of every row (with the index of the DataFrame)
+        """
+        return pd.util.hash_pandas_object(data_frame, index=False)
+
+    @staticmethod
+    def hash_groups(data_frame: pd.DataFrame, number_label: str) -> dict:
+        """Returns the hashes of all rows per structure number.
+
+        Parameters
+        ----------
+        data_frame : pandas.DataFrame
+            The DataFrame with the related rows (e.g. the maintenance
+            measures)
+        number_label : str
+            The label of the column with the structure numbers
+
+        Returns
+        -------
+        dict
+            A dictionary mapping every structure number to a tuple of the
+            hashes of its rows (in the order of the rows)
+        """
+        hashes = ResultStore.hash_rows(data_frame)
+        return hashes.groupby(
+            data_frame[number_label].astype(str), sort=False).agg(
+                tuple).to_dict()
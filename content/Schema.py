@@ -0,0 +1,110 @@
+import pandas as pd
+import Labels
+
+
+class Schema:
+    """The column types of the sheets we read from the KUBA workbooks.
+
+    Text columns with a small number of distinct values are stored as
+    categories, numeric columns as float64 and dates as datetime64.
+    Numeric columns intentionally stay float64 (instead of nullable integer
+    types) because the risk calculations test missing values with
+    math.isnan(), which doesn't accept pandas.NA.
+    """
+
+    CATEGORY = 'category'
+    NUMBER = 'number'
+    DATE = 'date'
+
+    COLUMN_TYPES = {
+        # text columns
+        Labels.NORM_YEAR_LABEL: CATEGORY,
+        Labels.TYPE_TEXT_LABEL: CATEGORY,
+        Labels.MATERIAL_TEXT_LABEL: CATEGORY,
+        Labels.FUNCTION_LABEL: CATEGORY,
+        Labels.FUNCTION_TEXT_LABEL: CATEGORY,
+        Labels.AXIS_LABEL: CATEGORY,
+        Labels.SUPPORT_WALL_TYPE_LABEL: CATEGORY,
+        Labels.SUPPORT_CONSEQUENCE_OF_COLLAPSE: CATEGORY,
+
+        # numeric columns
+        Labels.SKEW_LABEL: NUMBER,
+        Labels.X_LABEL: NUMBER,
+        Labels.Y_LABEL: NUMBER,
+        Labels.YEAR_OF_CONSTRUCTION_LABEL: NUMBER,
+        Labels.LENGTH_LABEL: NUMBER,
+        Labels.WIDTH_LABEL: NUMBER,
+        Labels.LARGEST_SPAN_LABEL: NUMBER,
+        Labels.SPAN_LABEL: NUMBER,
+        Labels.TYPE_CODE_LABEL: NUMBER,
+        # contains '\' placeholders for unknown materials
+        Labels.MATERIAL_CODE_LABEL: NUMBER,
+        Labels.CONDITION_CLASS_LABEL: NUMBER,
+        Labels.SUPPORT_CONDITION_LABEL: NUMBER,
+        Labels.SUPPORT_X_LABEL: NUMBER,
+        Labels.SUPPORT_Y_LABEL: NUMBER,
+        Labels.SUPPORT_AREA_LABEL: NUMBER,
+        Labels.SUPPORT_MAX_HEIGHT_LABEL: NUMBER,
+        Labels.SUPPORT_LENGTH_LABEL: NUMBER,
+        Labels.SUPPORT_WIDTH_LABEL: NUMBER,
+        Labels.SUPPORT_AVERAGE_HEIGHT_LABEL: NUMBER,
+
+        # date columns
+        Labels.MAINTENANCE_ACCEPTANCE_DATE_LABEL: DATE
+    }
+
+    # the texts that mark unknown values in numeric and date columns
+    PLACEHOLDERS = {'', '\\'}
+
+    # the number of invalid values that are shown in a warning
+    MAX_INVALID_EXAMPLES = 5
+
+    @staticmethod
+    def apply(data_frame: pd.DataFrame) -> pd.DataFrame:
+        """Converts all columns of a DataFrame that are part of the schema.
+
+        Values that can't be converted become missing values. A warning is
+        printed for every column with values that can't be converted (e.g.
+        typos in the workbook), except for the placeholders of unknown
+        values (e.g. the '\\' placeholders in numeric columns). Columns
+        that are not part of the schema are left unchanged.
+
+        Parameters
+        ----------
+        data_frame : pandas.DataFrame
+            The DataFrame as read from the workbook
+
+        Returns
+        -------
+        pandas.DataFrame
+            The DataFrame with converted columns
+        """
+        for column in data_frame.columns:
+            column_type = Schema.COLUMN_TYPES.get(column)
+            if column_type == Schema.CATEGORY:
+                data_frame[column] = data_frame[column].astype('category')
+            elif column_type == Schema.NUMBER:
+                values = data_frame[column]
+                data_frame[column] = pd.to_numeric(
+                    values, errors='coerce').astype('float64')
+                Schema.__report_invalid(column, values, data_frame[column])
+            elif column_type == Schema.DATE:
+                values = data_frame[column]
+                data_frame[column] = pd.to_datetime(
+                    values, errors='coerce')
+                Schema.__report_invalid(column, values, data_frame[column])
+        return data_frame
+
+    @staticmethod
+    def __report_invalid(column, values, converted):
+        # the values that only became missing values by the conversion
+        invalid = values[values.notna() & converted.isna()]
+        invalid = invalid[~invalid.astype(str).str.strip().isin(
+            Schema.PLACEHOLDERS)]
+        if invalid.empty:
+            return
+        examples = invalid.astype(str).unique()[
+            :Schema.MAX_INVALID_EXAMPLES]
+        print('WARNING: ' + str(len(invalid)) + ' invalid values in column "' +
+              column + '" were ignored: ' +
+              ', '.join('"' + example + '"' for example in examples))
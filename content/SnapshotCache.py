@@ -0,0 +1,254 @@
+import geopandas as gpd
+import glob
+import hashlib
+import os
+import pandas as pd
+from Schema import Schema
+from WorkbookLoader import WorkbookLoader
+
+
+class SnapshotCache:
+    """A cache of binary columnar snapshots of spreadsheet sheets and zones.
+
+    Every sheet (or table prepared from a sheet) is stored as a Feather file
+    (or as a pickle file if pyarrow is not available or the sheet contains
+    columns with mixed types). Zone
+    layers are stored as GeoParquet files (or as pickle files if pyarrow is
+    not available). The snapshots are keyed by a hash of the content of the
+    source file and of the column types (see Schema), so they become stale
+    automatically as soon as the source file or the column types change.
+    """
+
+    # increase when the format of the snapshots changes
+    VERSION = 2
+
+    def __init__(self, directory: str) -> None:
+        """Initialize the SnapshotCache.
+
+        Parameters
+        ----------
+        directory : str
+            The directory where the snapshots are stored
+        """
+        self.directory = directory
+        self.file_hashes = {}
+
+    def read_sheets(self,
+                    file_name: str,
+                    sheet_names: list,
+                    columns: set = None) -> dict:
+        """Reads the given sheets of a workbook from the snapshot cache.
+
+        Sheets without a valid snapshot are read from the workbook (in a
+        single pass) and stored in the cache for later calls.
+
+        Parameters
+        ----------
+        file_name : str
+            The file name of the Excel workbook
+        sheet_names : list
+            The names of the sheets to read
+        columns : set
+            The names of the columns to keep (default is None, which keeps
+            all columns)
+
+        Returns
+        -------
+        dict
+            A dictionary mapping every sheet name to its DataFrame
+        """
+        file_hash = self.get_file_hash(file_name)
+
+        data_frames = {}
+        missing_sheet_names = []
+        for sheet_name in sheet_names:
+            path = self.__get_snapshot_path(
+                file_name, sheet_name, columns, file_hash)
+            data_frame = SnapshotCache.__load_snapshot(path)
+            if data_frame is None:
+                missing_sheet_names.append(sheet_name)
+            else:
+                data_frames[sheet_name] = data_frame
+
+        if missing_sheet_names:
+            loaded_data_frames = WorkbookLoader.read_sheets(
+                file_name, missing_sheet_names, columns)
+            for sheet_name, data_frame in loaded_data_frames.items():
+                path = self.__get_snapshot_path(
+                    file_name, sheet_name, columns, file_hash)
+                try:
+                    self.__store_snapshot(path, data_frame)
+                except OSError:
+                    # e.g. a read-only file system, continue without cache
+                    pass
+                data_frames[sheet_name] = data_frame
+
+        # keep the order of the requested sheets
+        return {sheet_name: data_frames[sheet_name]
+                for sheet_name in sheet_names}
+
+    def read_zones(self,
+                   file_name: str,
+                   layer_name: str,
+                   prepare=None,
+                   arguments: tuple = ()) -> gpd.GeoDataFrame:
+        """Reads a zone layer from a zipped shapefile or the snapshot cache.
+
+        Layers without a valid snapshot are read from the shapefile,
+        prepared and stored in the cache for later calls. Therefore decoding
+        the shapefile and preparing the layer only happens once per version
+        of the shapefile.
+
+        Parameters
+        ----------
+        file_name : str
+            The file name of the zipped shapefile
+        layer_name : str
+            The name of the layer in the zip file
+        prepare : function
+            A function that prepares the layer (e.g. reprojects and
+            simplifies it) before it is stored (default is None, which stores
+            the layer as read)
+        arguments : tuple
+            Additional arguments of the prepare function (default is no
+            additional arguments)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The prepared layer
+        """
+        file_hash = self.get_file_hash(file_name)
+        # different preparations of the same layer get different snapshots
+        path = self.__get_snapshot_path(
+            file_name,
+            (layer_name, None if prepare is None else prepare.__qualname__,
+             arguments),
+            None, file_hash)
+        zones = SnapshotCache.__load_snapshot(path)
+        if zones is None:
+            zones = gpd.read_file('zip://' + file_name + '!' + layer_name)
+            if prepare is not None:
+                zones = prepare(zones, *arguments)
+            try:
+                self.__store_snapshot(path, zones)
+            except OSError:
+                # e.g. a read-only file system, continue without cache
+                pass
+        return zones
+
+    def read_table(self,
+                   file_name: str,
+                   sheet_name: str,
+                   prepare) -> pd.DataFrame:
+        """Reads a table prepared from a sheet of a workbook.
+
+        Tables without a valid snapshot are prepared from the sheet (read
+        from the workbook) and stored in the cache for later calls.
+
+        Parameters
+        ----------
+        file_name : str
+            The file name of the Excel workbook
+        sheet_name : str
+            The name of the sheet
+        prepare : function
+            A function that creates the table from the sheet
+
+        Returns
+        -------
+        pandas.DataFrame
+            The prepared table
+        """
+        file_hash = self.get_file_hash(file_name)
+        path = self.__get_snapshot_path(
+            file_name, (sheet_name, prepare.__qualname__), None, file_hash)
+        table = SnapshotCache.__load_snapshot(path)
+        if table is None:
+            sheet = WorkbookLoader.read_sheets(
+                file_name, [sheet_name])[sheet_name]
+            table = prepare(sheet)
+            try:
+                self.__store_snapshot(path, table)
+            except OSError:
+                # e.g. a read-only file system, continue without cache
+                pass
+        return table
+
+    def get_file_hash(self, file_name: str) -> str:
+        """Returns the SHA-256 hash of the content of a file.
+
+        The hash is computed only once per file and instance.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file
+
+        Returns
+        -------
+        str
+            The hexadecimal SHA-256 hash of the file content
+        """
+        file_hash = self.file_hashes.get(file_name)
+        if file_hash is None:
+            sha256 = hashlib.sha256()
+            with open(file_name, 'rb') as file:
+                for block in iter(lambda: file.read(1 << 20), b''):
+                    sha256.update(block)
+            file_hash = sha256.hexdigest()
+            self.file_hashes[file_name] = file_hash
+        return file_hash
+
+    def __get_snapshot_path(self, file_name, sheet_name, columns, file_hash):
+        # The sheet key identifies the sheet (and the selected columns), the
+        # content key identifies the version of the source file and of the
+        # column types. Snapshots with the same sheet key but another content
+        # key are stale.
+        sheet_key = hashlib.sha256(repr((
+            SnapshotCache.VERSION, os.path.basename(file_name), sheet_name,
+            None if columns is None else sorted(columns))).encode()
+        ).hexdigest()[:16]
+        content_key = hashlib.sha256(repr((
+            file_hash, sorted(Schema.COLUMN_TYPES.items()))).encode()
+        ).hexdigest()[:16]
+        return os.path.join(
+            self.directory, sheet_key + '-' + content_key)
+
+    @staticmethod
+    def __load_snapshot(path):
+        try:
+            if os.path.isfile(path + '.parquet'):
+                return gpd.read_parquet(path + '.parquet')
+            if os.path.isfile(path + '.feather'):
+                return pd.read_feather(path + '.feather')
+            if os.path.isfile(path + '.pkl'):
+                return pd.read_pickle(path + '.pkl')
+        except Exception:
+            # a broken snapshot (or a missing pyarrow) is no reason to fail,
+            # we simply read the workbook again
+            pass
+        return None
+
+    def __store_snapshot(self, path, data_frame):
+        os.makedirs(self.directory, exist_ok=True)
+
+        # remove stale snapshots of older versions of the source file
+        sheet_key = os.path.basename(path).split('-')[0]
+        for stale_path in glob.glob(
+                os.path.join(self.directory, sheet_key + '-*')):
+            os.remove(stale_path)
+
+        temp_path = path + '.tmp'
+        try:
+            if isinstance(data_frame, gpd.GeoDataFrame):
+                data_frame.to_parquet(temp_path)
+                os.replace(temp_path, path + '.parquet')
+            else:
+                data_frame.to_feather(temp_path)
+                os.replace(temp_path, path + '.feather')
+        except Exception:
+            # pyarrow is missing or the sheet has columns with mixed types
+            # (e.g. '\' placeholders in numeric columns)
+            data_frame.to_pickle(temp_path)
+            os.replace(temp_path, path + '.pkl')
@@ -0,0 +1,243 @@
+import geopandas as gpd
+import numpy as np
+import os
+import pandas as pd
+import shapely
+from Coordinates import Coordinates
+
+
+class StructureIndex:
+    """A spatial index over the points of structures (bridges or support
+    structures).
+
+    The index answers radius, bounding box, polygon and k-nearest queries
+    and returns the rows of the matching structures. All queries are done
+    in LV95 (metric), the query geometry can be given in any CRS.
+
+    Only the rows of the structures are stored, the spatial index (an
+    STRtree) is rebuilt from their points when it is loaded. This is fast
+    and allows loading the index (e.g. in a script) without reading the KUBA
+    workbooks:
+
+        index = StructureIndex.load('data/snapshots/bridge_index.pkl')
+        index.within_radius(2600000, 1200000, 2000)
+    """
+
+    # increase when the format of the index changes
+    VERSION = 1
+
+    def __init__(self, structures: gpd.GeoDataFrame) -> None:
+        """Initialize the StructureIndex.
+
+        Parameters
+        ----------
+        structures : geopandas.GeoDataFrame
+            The structures with their points in LV95 (structures with empty
+            points are not indexed)
+        """
+        self.structures = structures
+        located = ~structures.geometry.is_empty.to_numpy()
+        self.positions = np.flatnonzero(located)
+        points = structures.geometry.values[located]
+        self.x = shapely.get_x(points)
+        self.y = shapely.get_y(points)
+        self.tree = shapely.STRtree(points)
+
+    @staticmethod
+    def get(structures: gpd.GeoDataFrame,
+            file_name: str,
+            data_hash: str):
+        """Returns the index of the given structures.
+
+        The index is loaded from the file if it was built from the same
+        rows, otherwise it is built and stored in the file.
+
+        Parameters
+        ----------
+        structures : geopandas.GeoDataFrame
+            The structures with their points in LV95
+        file_name : str
+            The name of the file where the index is stored
+        data_hash : str
+            The hash of the rows of the structures
+
+        Returns
+        -------
+        StructureIndex
+            The index
+        """
+        try:
+            if os.path.isfile(file_name):
+                stored = pd.read_pickle(file_name)
+                if (stored['version'] == StructureIndex.VERSION and
+                        stored['data_hash'] == data_hash):
+                    return StructureIndex(stored['structures'])
+        except Exception:
+            # a broken index is no reason to fail, we simply build it again
+            pass
+
+        structure_index = StructureIndex(structures)
+        temp_file_name = file_name + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            pd.to_pickle(
+                {'version': StructureIndex.VERSION, 'data_hash': data_hash,
+                 'structures': structures},
+                temp_file_name)
+            os.replace(temp_file_name, file_name)
+        except OSError:
+            # e.g. a read-only file system, continue without storing
+            pass
+        return structure_index
+
+    @staticmethod
+    def load(file_name: str):
+        """Loads a stored index.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file where the index is stored
+
+        Returns
+        -------
+        StructureIndex
+            The index
+        """
+        return StructureIndex(pd.read_pickle(file_name)['structures'])
+
+    def within_radius(self, x: float, y: float, radius: float,
+                      crs: str = Coordinates.LV95) -> gpd.GeoDataFrame:
+        """Returns the structures within a radius around a point.
+
+        Parameters
+        ----------
+        x : float
+            The x coordinate (easting resp. longitude) of the point
+        y : float
+            The y coordinate (northing resp. latitude) of the point
+        radius : float
+            The radius in meters
+        crs : str
+            The CRS of the point (default is LV95)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The rows of the structures with an additional column 'distance'
+            (in meters), sorted by distance
+        """
+        point = Coordinates.create_points(
+            [x], [y], source_crs=crs, target_crs=Coordinates.LV95)[0]
+        # a point that can't be converted (e.g. NaN coordinates) is empty
+        if point.is_empty:
+            return self.__get_rows(np.arange(0), np.zeros(0))
+        indices = self.tree.query(point, predicate='dwithin',
+                                  distance=radius)
+        distances = self.__get_distances(point, indices)
+        order = np.argsort(distances, kind='stable')
+        return self.__get_rows(indices[order], distances[order])
+
+    def within_bbox(self, min_x: float, min_y: float,
+                    max_x: float, max_y: float,
+                    crs: str = Coordinates.LV95) -> gpd.GeoDataFrame:
+        """Returns the structures within a bounding box.
+
+        Parameters
+        ----------
+        min_x : float
+            The minimal x coordinate (easting resp. longitude)
+        min_y : float
+            The minimal y coordinate (northing resp. latitude)
+        max_x : float
+            The maximal x coordinate (easting resp. longitude)
+        max_y : float
+            The maximal y coordinate (northing resp. latitude)
+        crs : str
+            The CRS of the bounding box (default is LV95)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The rows of the structures (in the order of the rows)
+        """
+        return self.within_polygon(
+            shapely.box(min_x, min_y, max_x, max_y), crs)
+
+    def within_polygon(self, polygon,
+                       crs: str = Coordinates.LV95) -> gpd.GeoDataFrame:
+        """Returns the structures within a polygon.
+
+        Parameters
+        ----------
+        polygon : shapely.Geometry
+            The polygon (structures on its boundary are included)
+        crs : str
+            The CRS of the polygon (default is LV95)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The rows of the structures (in the order of the rows)
+        """
+        if crs != Coordinates.LV95:
+            polygon = shapely.transform(
+                polygon,
+                Coordinates.get_transformer(
+                    crs, Coordinates.LV95).transform,
+                interleaved=False)
+        indices = self.tree.query(polygon, predicate='intersects')
+        return self.__get_rows(np.sort(indices))
+
+    def nearest(self, x: float, y: float, k: int = 1,
+                crs: str = Coordinates.LV95) -> gpd.GeoDataFrame:
+        """Returns the k structures nearest to a point.
+
+        Parameters
+        ----------
+        x : float
+            The x coordinate (easting resp. longitude) of the point
+        y : float
+            The y coordinate (northing resp. latitude) of the point
+        k : int
+            The number of structures (default is 1)
+        crs : str
+            The CRS of the point (default is LV95)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The rows of the structures with an additional column 'distance'
+            (in meters), sorted by distance
+        """
+        point = Coordinates.create_points(
+            [x], [y], source_crs=crs, target_crs=Coordinates.LV95)[0]
+        k = min(k, len(self.positions))
+        # a point that can't be converted (e.g. NaN coordinates) is empty
+        if k < 1 or point.is_empty:
+            return self.__get_rows(np.arange(0), np.zeros(0))
+        # the distance to the nearest structure is the initial search
+        # radius, it is doubled until at least k structures are found
+        indices, distances = self.tree.query_nearest(
+            point, return_distance=True)
+        radius = distances[0]
+        while len(indices) < k:
+            radius = max(2 * radius, 1)
+            indices = self.tree.query(point, predicate='dwithin',
+                                      distance=radius)
+        distances = self.__get_distances(point, indices)
+        if k < len(indices):
+            nearest = np.argpartition(distances, k - 1)[:k]
+            indices = indices[nearest]
+            distances = distances[nearest]
+        order = np.argsort(distances, kind='stable')
+        return self.__get_rows(indices[order], distances[order])
+
+    def __get_distances(self, point, indices):
+        return np.hypot(self.x[indices] - point.x, self.y[indices] - point.y)
+
+    def __get_rows(self, indices, distances=None):
+        rows = self.structures.iloc[self.positions[indices]]
+        if distances is not None:
+            rows = rows.assign(distance=distances)
+        return rows
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from SnapshotCache import SnapshotCache
+
+
+class TrafficBulletin:
+    """Reads the traffic bulletin of ASTRA into a tidy table.
+
+    The sheet 'DTV mit Klassen' has one block of lines per measuring
+    station: the first line contains the number and the name of the
+    station and its axis, every line contains one measure (e.g. "DTV" or
+    "DWV SV") with its monthly values. The columns are found by their
+    headings ("No", "Messstelle", "Strasse" and the months "01" to "12") and
+    the measures by their names, not by their position in the sheet.
+
+    The tidy table has one row per axis, station, measure and month and is
+    indexed by these columns, e.g.:
+
+        bulletin.loc[('A 1', '002', 'DTV')]           # one station
+        bulletin.xs('DWV SV', level='measure')        # one measure
+
+    It is kept in the snapshot cache, so the sheet is only parsed again when
+    the bulletin changes.
+    """
+
+    SHEET_NAME = 'DTV mit Klassen'
+
+    # "DTV" = "Durchschnittlicher Tagesverkehr"
+    AADT_MEASURE = 'DTV'
+    # "DWV SV" =
+    #       "Durchschnittlicher Werktagesverkehr"
+    #       "Schwerverkehr (Klassen 1, 8, 9, 10)"
+    HEAVY_DUTY_MEASURE = 'DWV SV'
+
+    INDEX = ['axis', 'station', 'measure', 'month']
+
+    @staticmethod
+    def read(snapshot_cache: SnapshotCache, file_name: str) -> pd.DataFrame:
+        """Reads the traffic bulletin.
+
+        Parameters
+        ----------
+        snapshot_cache : SnapshotCache
+            The cache of the prepared tables
+        file_name : str
+            The file name of the bulletin
+
+        Returns
+        -------
+        pandas.DataFrame
+            The tidy table (see TrafficBulletin)
+        """
+        table = snapshot_cache.read_table(
+            file_name, TrafficBulletin.SHEET_NAME, TrafficBulletin.parse)
+        return table.set_index(TrafficBulletin.INDEX).sort_index()
+
+    @staticmethod
+    def parse(sheet: pd.DataFrame) -> pd.DataFrame:
+        """Parses the sheet 'DTV mit Klassen' of the bulletin.
+
+        Parameters
+        ----------
+        sheet : pandas.DataFrame
+            The sheet as read from the workbook
+
+        Returns
+        -------
+        pandas.DataFrame
+            The columns 'axis', 'station', 'station_name', 'measure',
+            'month' and 'value' (only months with a value and stations with
+            an axis)
+        """
+        cells = sheet.to_numpy(dtype=object)
+        # empty texts are missing values
+        texts = pd.DataFrame(cells).apply(
+            lambda column: column.map(
+                lambda cell: (cell.strip() or None)
+                if isinstance(cell, str) else cell))
+
+        # the heading line is the line with the heading "Messstelle"
+        heading_rows = np.flatnonzero(
+            (texts == 'Messstelle').any(axis=1).to_numpy())
+        if len(heading_rows) == 0:
+            raise ValueError('no heading "Messstelle" in the bulletin')
+        heading_row = heading_rows[0]
+        headings = texts.iloc[heading_row]
+        number_column = TrafficBulletin.__find_column(headings, 'No')
+        name_column = TrafficBulletin.__find_column(headings, 'Messstelle')
+        axis_column = TrafficBulletin.__find_column(headings, 'Strasse')
+        month_columns = {
+            column: int(heading) for column, heading in headings.items()
+            if isinstance(heading, (str, int)) and
+            str(heading).isdigit() and 1 <= int(heading) <= 12}
+
+        lines = texts.iloc[heading_row + 1:]
+        # the measures are in the column with the most "DTV" lines
+        measure_column = (
+            lines == TrafficBulletin.AADT_MEASURE).sum().idxmax()
+
+        # every line belongs to the station of the last station line
+        stations = pd.DataFrame({
+            'axis': lines[axis_column],
+            'station': lines[number_column].map(
+                lambda number: number if pd.isna(number) else str(number)),
+            'station_name': lines[name_column]})
+        station_lines = stations['station'].notna()
+        blocks = station_lines.cumsum()
+        stations = stations[station_lines].set_axis(
+            blocks[station_lines]).reindex(blocks).set_axis(lines.index)
+        # stations without an axis can not be assigned to an axis
+        measure_lines = lines[measure_column].notna() & (
+            stations['station'].notna()) & stations['axis'].notna()
+
+        months = lines.loc[measure_lines, list(month_columns)].apply(
+            pd.to_numeric, errors='coerce')
+        months.columns = list(month_columns.values())
+        months = months.assign(
+            measure=lines.loc[measure_lines, measure_column],
+            **stations[measure_lines])
+        table = months.melt(
+            id_vars=['axis', 'station', 'station_name', 'measure'],
+            var_name='month', value_name='value').dropna(subset=['value'])
+
+        # categories keep the table small, the names repeat a lot
+        for label in ('axis', 'station', 'station_name', 'measure'):
+            table[label] = table[label].astype('category')
+        table['month'] = table['month'].astype('int8')
+        table['value'] = table['value'].astype('float64')
+        return table.reset_index(drop=True)
+
+    @staticmethod
+    def __find_column(headings, heading):
+        columns = headings.index[headings == heading]
+        if len(columns) == 0:
+            raise ValueError(
+                'no heading "' + heading + '" in the bulletin')
+        return columns[0]
@@ -0,0 +1,103 @@
+import math
+import pandas as pd
+from TrafficBulletin import TrafficBulletin
+
+
+class TrafficTable:
+    """The average traffic per traffic axis of the traffic bulletin.
+
+    The average annual daily traffic (AADT) and the percentage of cars are
+    calculated once for every traffic axis of the bulletin, all lookups of
+    the structures are served from this table.
+
+    The monthly values of all measuring points of an axis can be averaged in
+    two ways:
+      - MEAN_OF_MEANS: the mean value of the mean values of the measuring
+        points (every measuring point has the same weight)
+      - MEAN_OF_VALUES: the mean value of all monthly values (measuring
+        points with more months have more weight)
+    """
+
+    MEAN_OF_MEANS = 'mean of means'
+    MEAN_OF_VALUES = 'mean of values'
+
+    # the values used for axes without useful data in the bulletin
+    DEFAULT_AADT = 5000
+    DEFAULT_PERCENTAGE_OF_CARS = 0.95
+
+    def __init__(self, bulletin: pd.DataFrame,
+                 aggregation: str = MEAN_OF_MEANS) -> None:
+        """Initialize the TrafficTable from the traffic bulletin.
+
+        Parameters
+        ----------
+        bulletin : pandas.DataFrame
+            The tidy table of the traffic bulletin (see TrafficBulletin)
+        aggregation : str
+            How the monthly values of an axis are averaged (MEAN_OF_MEANS or
+            MEAN_OF_VALUES, default is MEAN_OF_MEANS)
+        """
+        values = bulletin['value']
+        aadts = TrafficTable.__aggregate(
+            values.xs(TrafficBulletin.AADT_MEASURE, level='measure'),
+            aggregation)
+        heavy_duty_means = TrafficTable.__aggregate(
+            values.xs(TrafficBulletin.HEAVY_DUTY_MEASURE, level='measure'),
+            aggregation)
+
+        self.traffic = {}
+        for traffic_axis, aadt in aadts.items():
+            if math.isnan(aadt):
+                # no useful data found in Bulletin
+                continue
+            # The average values are very wide spread!
+            # e.g. for "A 1", the minimum is 20'481, the maximum is 145'759
+            # Decision: we accept this like it is.
+            percentage_of_trucks = (
+                heavy_duty_means.get(traffic_axis, math.nan) * 100) / aadt
+            # convert aadt from float to the next rounded int
+            # (the values are large enough)
+            self.traffic[traffic_axis] = (
+                round(aadt), 1 - percentage_of_trucks)
+
+    def get(self, traffic_axis: str) -> tuple:
+        """Returns the traffic of an axis.
+
+        Parameters
+        ----------
+        traffic_axis : str
+            The traffic axis (e.g. "A 1")
+
+        Returns
+        -------
+        tuple
+            The AADT and the percentage of cars (default values if the
+            bulletin has no useful data for this axis)
+        """
+        return self.traffic.get(
+            traffic_axis,
+            (TrafficTable.DEFAULT_AADT,
+             TrafficTable.DEFAULT_PERCENTAGE_OF_CARS))
+
+    def get_axes_with_data(self) -> set:
+        """Returns the traffic axes with complete data in the bulletin.
+
+        Returns
+        -------
+        set
+            The traffic axes with an AADT and a percentage of cars
+        """
+        return {traffic_axis for traffic_axis, (aadt, percentage_of_cars)
+                in self.traffic.items()
+                if not (math.isnan(aadt) or math.isnan(percentage_of_cars))}
+
+    @staticmethod
+    def __aggregate(values, aggregation):
+        if aggregation == TrafficTable.MEAN_OF_MEANS:
+            # first the mean value of every measuring point
+            station_means = values.groupby(
+                level=['axis', 'station'], observed=True).mean()
+            return station_means.groupby(level='axis', observed=True).mean()
+        if aggregation == TrafficTable.MEAN_OF_VALUES:
+            return values.groupby(level='axis', observed=True).mean()
+        raise ValueError('unknown aggregation: ' + str(aggregation))
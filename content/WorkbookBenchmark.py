@@ -0,0 +1,82 @@
+import os.path
+import sys
+import time
+import pandas as pd
+from WorkbookLoader import WorkbookLoader
+
+
+class WorkbookBenchmark:
+    """Measures how long every spreadsheet engine needs for our workbooks.
+
+    Run it in the directory of the notebook (Pyodide) or on the command line
+    (Linux batch servers) and configure the fastest engine with the
+    environment variable KUBA_SPREADSHEET_ENGINES:
+
+        python WorkbookBenchmark.py [repetitions]
+    """
+
+    # the workbooks and sheets that are read in KUBA.__init__
+    # (file name, sheet names, only read the columns used in Labels)
+    WORKBOOKS = [
+        ('data/Bauwerksdaten aus KUBA.xlsx',
+         ['Alle Bauwerke mit Zusatzinfo',
+          'Alle Brücken mit Zusatzinfos',
+          'Bauwerke mitErdbebenüberprüfung',
+          'BW letzte Erhaltungsmassnahme'],
+         True),
+        ('data/Abfrage alle Infrastrukturobj Zusatzinfos inkl Nutzung.xlsx',
+         ['2024-04-18 aus KUBA+Funktion'],
+         True),
+        ('data/Bulletin_2023_de.xlsx',
+         ['DTV mit Klassen'],
+         False)]
+
+    @staticmethod
+    def run(repetitions: int = 3,
+            engines: list = WorkbookLoader.ENGINES) -> pd.DataFrame:
+        """Reads all workbooks with every engine and measures the time.
+
+        Workbooks that do not exist are skipped.
+
+        Parameters
+        ----------
+        repetitions : int
+            How many times every workbook is read with every engine
+            (default is 3)
+        engines : list
+            The engines to measure (default is all known engines)
+
+        Returns
+        -------
+        pandas.DataFrame
+            The best and the mean time in seconds per workbook and engine,
+            engines that are not available have no times
+        """
+        label_columns = WorkbookLoader.get_label_columns()
+        results = []
+        for file_name, sheet_names, project in WorkbookBenchmark.WORKBOOKS:
+            if not os.path.isfile(file_name):
+                continue
+            columns = label_columns if project else None
+            for engine in engines:
+                times = []
+                try:
+                    for _ in range(repetitions):
+                        start = time.perf_counter()
+                        WorkbookLoader.read_sheets(
+                            file_name, sheet_names, columns, [engine])
+                        times.append(time.perf_counter() - start)
+                except ImportError:
+                    # the engine is not available in this environment
+                    pass
+                results.append({
+                    'workbook': os.path.basename(file_name),
+                    'engine': engine,
+                    'best [s]': min(times) if times else None,
+                    'mean [s]': sum(times) / len(times) if times else None})
+        return pd.DataFrame(results)
+
+
+if __name__ == '__main__':
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(WorkbookBenchmark.run(repetitions).to_string(index=False))
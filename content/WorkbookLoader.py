@@ -0,0 +1,248 @@
+import openpyxl
+import os
+import pandas as pd
+from pandas.io.parsers import TextParser
+import Labels
+from Schema import Schema
+
+
+class WorkbookLoader:
+    """Loads several sheets of an Excel workbook in a single pass.
+
+    The workbook is parsed by one of the following engines:
+
+    - 'calamine': the Rust based reader of python-calamine (if installed)
+    - 'openpyxl': the default openpyxl engine of pandas
+    - 'openpyxl-streaming': openpyxl in read-only mode, streaming the rows
+      and keeping only the selected columns of every row
+
+    The engines are tried in the order given in `engines`. Engines that are
+    not available (e.g. because python-calamine is not installed in Pyodide)
+    are skipped. The order can be changed per deployment with the
+    environment variable KUBA_SPREADSHEET_ENGINES, e.g.
+    KUBA_SPREADSHEET_ENGINES=openpyxl-streaming,openpyxl
+    """
+
+    ENGINES = ('calamine', 'openpyxl', 'openpyxl-streaming')
+
+    engines = os.environ.get(
+        'KUBA_SPREADSHEET_ENGINES', 'calamine,openpyxl').split(',')
+
+    @staticmethod
+    def get_label_columns() -> set:
+        """Returns the names of all columns that are referenced in Labels.
+
+        Returns
+        -------
+        set
+            The column names defined as constants in the Labels module
+        """
+        return {value for name, value in vars(Labels).items()
+                if name.isupper() and isinstance(value, str)}
+
+    @staticmethod
+    def read_sheets(file_name: str,
+                    sheet_names: list,
+                    columns: set = None,
+                    engines: list = None) -> dict:
+        """Reads the given sheets of a workbook, opening the workbook once.
+
+        The columns are converted to the types declared in Schema.
+
+        Parameters
+        ----------
+        file_name : str
+            The file name of the Excel workbook
+        sheet_names : list
+            The names of the sheets to read
+        columns : set
+            The names of the columns to keep, all other columns are skipped
+            while parsing (default is None, which keeps all columns)
+        engines : list
+            The engines to try, in this order (default is None, which uses
+            WorkbookLoader.engines)
+
+        Returns
+        -------
+        dict
+            A dictionary mapping every sheet name to its DataFrame
+        """
+        data_frames = WorkbookLoader.__read_sheets(
+            file_name, sheet_names, columns, engines)
+        return {sheet_name: Schema.apply(data_frame)
+                for sheet_name, data_frame in data_frames.items()}
+
+    @staticmethod
+    def __read_sheets(file_name, sheet_names, columns, engines):
+        if engines is None:
+            engines = WorkbookLoader.engines
+
+        for engine in engines:
+            engine = engine.strip()
+            if engine not in WorkbookLoader.ENGINES:
+                raise ValueError('unknown spreadsheet engine: ' + engine)
+            if engine == 'openpyxl-streaming':
+                return WorkbookLoader.__read_streaming(
+                    file_name, sheet_names, columns)
+            try:
+                excel_file = pd.ExcelFile(file_name, engine=engine)
+            except (ImportError, ValueError):
+                # the engine is not installed or not supported by this
+                # version of pandas, try the next one
+                continue
+
+            # Parsing the workbook is the expensive part, therefore we open
+            # it only once and let every sheet skip the columns we never read.
+            with excel_file:
+                return {
+                    sheet_name: excel_file.parse(
+                        sheet_name,
+                        usecols=(None if columns is None
+                                 else lambda column: column in columns))
+                    for sheet_name in sheet_names}
+
+        raise ImportError(
+            'none of the spreadsheet engines is available: ' +
+            ', '.join(engines))
+
+    @staticmethod
+    def stream_sheet(file_name: str,
+                     sheet_name: str,
+                     columns: set = None,
+                     chunk_size: int = 1000) -> tuple:
+        """Reads a sheet of a workbook in chunks of rows.
+
+        The sheet is streamed with openpyxl in read-only mode, so the memory
+        usage depends on the chunk size and not on the size of the sheet.
+        The chunks are indexed continuously (the first chunk starts with
+        index 0, the second one with index chunk_size, ...) and their
+        columns are converted to the types declared in Schema.
+
+        Parameters
+        ----------
+        file_name : str
+            The file name of the Excel workbook
+        sheet_name : str
+            The name of the sheet to read
+        columns : set
+            The names of the columns to keep (default is None, which keeps
+            all columns)
+        chunk_size : int
+            The (minimal) number of rows per chunk (default is 1000)
+
+        Returns
+        -------
+        tuple
+            The estimated number of rows (as stored in the workbook, may be
+            None) and a generator of DataFrames (one per chunk)
+        """
+        workbook = openpyxl.load_workbook(
+            file_name, read_only=True, data_only=True, keep_links=False)
+        sheet = workbook[sheet_name]
+        row_count = None if sheet.max_row is None else sheet.max_row - 1
+        # the dimensions stored in some workbooks are wrong
+        sheet.reset_dimensions()
+
+        def generate_chunks():
+            try:
+                for data_frame in WorkbookLoader.__iter_chunks(
+                        sheet.iter_rows(values_only=True), columns,
+                        chunk_size):
+                    yield Schema.apply(data_frame)
+            finally:
+                workbook.close()
+
+        return row_count, generate_chunks()
+
+    @staticmethod
+    def __read_streaming(file_name, sheet_names, columns):
+        workbook = openpyxl.load_workbook(
+            file_name, read_only=True, data_only=True, keep_links=False)
+        try:
+            data_frames = {}
+            for sheet_name in sheet_names:
+                sheet = workbook[sheet_name]
+                # the dimensions stored in some workbooks are wrong
+                sheet.reset_dimensions()
+                # without a chunk size we get exactly one chunk
+                data_frames[sheet_name] = next(WorkbookLoader.__iter_chunks(
+                    sheet.iter_rows(values_only=True), columns, None))
+            return data_frames
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def __iter_chunks(rows, columns, chunk_size):
+        rows = iter(rows)
+        header = WorkbookLoader.__trim_row(next(rows, ()))
+
+        # name the columns like pandas does
+        names = []
+        for index, name in enumerate(header):
+            name = 'Unnamed: ' + str(index) if name is None else str(name)
+            unique_name = name
+            duplicates = 0
+            while unique_name in names:
+                duplicates += 1
+                unique_name = name + '.' + str(duplicates)
+            names.append(unique_name)
+        indices = [index for index, name in enumerate(names)
+                   if columns is None or name in columns]
+
+        data = []
+        # empty rows are only kept if a row with data follows
+        # (pandas trims trailing empty rows)
+        empty_rows = []
+        start = 0
+        for row in rows:
+            row = WorkbookLoader.__trim_row(row)
+            # rows can be wider than the header
+            for index in range(len(names), len(row)):
+                names.append('Unnamed: ' + str(index))
+                if columns is None or names[-1] in columns:
+                    indices.append(index)
+            values = [WorkbookLoader.__convert_value(row[index])
+                      if index < len(row) else '' for index in indices]
+            if not row:
+                empty_rows.append(values)
+                continue
+            data.extend(empty_rows)
+            empty_rows.clear()
+            data.append(values)
+            if chunk_size is not None and len(data) >= chunk_size:
+                yield WorkbookLoader.__to_data_frame(
+                    data, names, indices, start)
+                start += len(data)
+                data = []
+
+        if data or start == 0:
+            yield WorkbookLoader.__to_data_frame(data, names, indices, start)
+
+    @staticmethod
+    def __to_data_frame(data, names, indices, start):
+        # extend rows read before a wider row was found
+        for values in data:
+            values.extend([''] * (len(indices) - len(values)))
+
+        data_frame = TextParser(
+            data, names=[names[index] for index in indices],
+            header=None).read()
+        data_frame.index = pd.RangeIndex(start, start + len(data_frame))
+        return data_frame
+
+    @staticmethod
+    def __trim_row(row):
+        # trim trailing empty cells
+        length = len(row)
+        while length > 0 and row[length - 1] is None:
+            length -= 1
+        return row[:length]
+
+    @staticmethod
+    def __convert_value(value):
+        # the same conversion as in the openpyxl engine of pandas
+        if value is None:
+            return ''
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
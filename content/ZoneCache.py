@@ -0,0 +1,138 @@
+import numpy as np
+import os
+import pandas as pd
+
+
+class ZoneCache:
+    """A persistent cache of the zones assigned to the structures.
+
+    The zones are keyed by the structure number and the LV95 coordinates of
+    the structure, quantised to decimeters. The cache is stamped with a hash
+    of the zone shapefile, so it becomes stale automatically as soon as the
+    zones change. Only the zones of structures that are not in the cache yet
+    are calculated. Zones of structures that were not requested in a
+    complete run (e.g. because the structure was removed from the export or
+    moved) are dropped when the cache is saved.
+    """
+
+    # increase when the format of the cache changes
+    VERSION = 1
+
+    # the coordinates are quantised to this resolution in meters
+    RESOLUTION = 0.1
+
+    def __init__(self, file_name: str, zones_hash: str) -> None:
+        """Initialize the ZoneCache and load the cached zones.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the file where the zones are cached
+        zones_hash : str
+            The hash of the zone shapefile
+        """
+        self.file_name = file_name
+        self.zones_hash = zones_hash
+        self.zones = {}
+        self.used_keys = set()
+        self.changed = False
+        try:
+            if os.path.isfile(file_name):
+                stored = pd.read_pickle(file_name)
+                if (stored['version'] == ZoneCache.VERSION and
+                        stored['zones_hash'] == zones_hash):
+                    table = stored['zones']
+                    self.zones = dict(zip(
+                        zip(table['number'], table['x'], table['y']),
+                        table['zone'].astype(object).where(
+                            table['zone'].notna(), None)))
+        except Exception:
+            # a broken cache is no reason to fail, we simply calculate the
+            # zones again
+            pass
+
+    def get_zones(self, numbers: pd.Series, points, calculate) -> pd.Series:
+        """Returns the zones of the given structures.
+
+        Parameters
+        ----------
+        numbers : pandas.Series
+            The structure numbers
+        points : geopandas.GeoSeries
+            The points of the structures in LV95 (with the same index as the
+            numbers)
+        calculate : function
+            A function that calculates the zones of a GeoSeries of points
+            (used for all structures that are not in the cache yet)
+
+        Returns
+        -------
+        pandas.Series
+            The zone of every structure (with the index of the points), None
+            for structures without coordinates or outside of all zones
+        """
+        located_points = points[~points.is_empty]
+        keys = dict(zip(located_points.index, zip(
+            numbers[located_points.index].astype(str),
+            ZoneCache.__quantise(located_points.x),
+            ZoneCache.__quantise(located_points.y))))
+
+        self.used_keys.update(keys.values())
+
+        missing = [i for i, key in keys.items() if key not in self.zones]
+        if missing:
+            calculated_zones = calculate(points.loc[missing])
+            for i in missing:
+                self.zones[keys[i]] = calculated_zones[i]
+            self.changed = True
+
+        return pd.Series(
+            [self.zones[keys[i]] if i in keys else None
+             for i in points.index],
+            index=points.index, dtype=object)
+
+    def save(self, complete: bool = True) -> None:
+        """Saves the cache to the file (only if it changed).
+
+        Parameters
+        ----------
+        complete : bool
+            If the zones of all structures of the export were requested
+            (default is True). Only then the zones of structures that were
+            not requested are dropped.
+        """
+        if complete:
+            unused_keys = self.zones.keys() - self.used_keys
+            if unused_keys:
+                for key in unused_keys:
+                    del self.zones[key]
+                self.changed = True
+        self.used_keys = set()
+        if not self.changed:
+            return
+        numbers, x, y = (zip(*self.zones.keys()) if self.zones
+                         else ((), (), ()))
+        table = pd.DataFrame({
+            'number': pd.Series(numbers, dtype=object),
+            'x': np.array(x, dtype='int64'),
+            'y': np.array(y, dtype='int64'),
+            # the zones repeat a lot, a category keeps the file small
+            'zone': pd.Series(list(self.zones.values()),
+                              dtype=object).astype('category')})
+        temp_file_name = self.file_name + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.file_name), exist_ok=True)
+            pd.to_pickle(
+                {'version': ZoneCache.VERSION, 'zones_hash': self.zones_hash,
+                 'zones': table},
+                temp_file_name)
+            os.replace(temp_file_name, self.file_name)
+            self.changed = False
+        except OSError:
+            # e.g. a read-only file system, continue without cache
+            pass
+
+    @staticmethod
+    def __quantise(coordinates):
+        return np.round(
+            coordinates.to_numpy() / ZoneCache.RESOLUTION).astype('int64')
@@ -0,0 +1,358 @@
+import geopandas as gpd
+import pandas as pd
+import shapely
+import sys
+from Coordinates import Coordinates
+from SnapshotCache import SnapshotCache
+
+
+class ZoneLayers:
+    """Reads the earthquake and precipitation zones.
+
+    The zones are read from zipped shapefiles. All calculations use the
+    zones in the Swiss coordinates (LV95, metric). The maps use simplified
+    versions (one per level of detail, see DISPLAY_LEVELS) that are
+    reprojected to EPSG:4326 (Leaflet always works in EPSG:4326). The
+    prepared layers are kept in the snapshot cache, so that the shapefiles
+    are only decoded and prepared again when they change. The cache can be
+    filled in advance (e.g. before deploying the notebook) with:
+
+        python ZoneLayers.py [snapshot directory]
+    """
+
+    EARTHQUAKE_ZONES_FILE_NAME = 'data/erdbebenzonen.zip'
+    EARTHQUAKE_ZONES_LAYER_NAME = 'Erdbebenzonen'
+    PRECIPITATION_ZONES_FILE_NAME = 'data/niederschlag.zip'
+    PRECIPITATION_ZONES_LAYER_NAME = 'niederschlag'
+
+    # the maximum distance in meters of a point outside of all earthquake
+    # zones to the nearest earthquake zone (e.g. bridges over lakes)
+    MAX_EARTHQUAKE_ZONE_DISTANCE = 1000
+
+    # the levels of detail of the zones on the maps:
+    # the minimal zoom level of the map and the simplification tolerance in
+    # meters used from this zoom level on
+    DISPLAY_LEVELS = {0: 200, 10: 50, 12: 10}
+
+    @staticmethod
+    def read_earthquake_zones(
+            snapshot_cache: SnapshotCache) -> gpd.GeoDataFrame:
+        """Reads the earthquake zones for the calculations.
+
+        Parameters
+        ----------
+        snapshot_cache : SnapshotCache
+            The cache of the prepared layers
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The earthquake zones in LV95
+        """
+        return snapshot_cache.read_zones(
+            ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME,
+            ZoneLayers.EARTHQUAKE_ZONES_LAYER_NAME,
+            ZoneLayers.prepare_earthquake_zones)
+
+    @staticmethod
+    def read_earthquake_zones_for_display(
+            snapshot_cache: SnapshotCache) -> dict:
+        """Reads the earthquake zones for the maps.
+
+        Parameters
+        ----------
+        snapshot_cache : SnapshotCache
+            The cache of the prepared layers
+
+        Returns
+        -------
+        dict
+            A dictionary mapping the minimal zoom level of every level of
+            detail to the simplified earthquake zones in EPSG:4326
+        """
+        return {
+            zoom: snapshot_cache.read_zones(
+                ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME,
+                ZoneLayers.EARTHQUAKE_ZONES_LAYER_NAME,
+                ZoneLayers.prepare_earthquake_zones_for_display,
+                (tolerance,))
+            for zoom, tolerance in ZoneLayers.DISPLAY_LEVELS.items()}
+
+    @staticmethod
+    def read_precipitation_zones(
+            snapshot_cache: SnapshotCache) -> gpd.GeoDataFrame:
+        """Reads the precipitation zones for the calculations.
+
+        Parameters
+        ----------
+        snapshot_cache : SnapshotCache
+            The cache of the prepared layers
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The precipitation zones in LV95
+        """
+        return snapshot_cache.read_zones(
+            ZoneLayers.PRECIPITATION_ZONES_FILE_NAME,
+            ZoneLayers.PRECIPITATION_ZONES_LAYER_NAME,
+            ZoneLayers.prepare_precipitation_zones)
+
+    @staticmethod
+    def read_precipitation_zones_for_display(
+            snapshot_cache: SnapshotCache) -> dict:
+        """Reads the precipitation zones for the maps.
+
+        Parameters
+        ----------
+        snapshot_cache : SnapshotCache
+            The cache of the prepared layers
+
+        Returns
+        -------
+        dict
+            A dictionary mapping the minimal zoom level of every level of
+            detail to the simplified precipitation zones in EPSG:4326
+        """
+        return {
+            zoom: snapshot_cache.read_zones(
+                ZoneLayers.PRECIPITATION_ZONES_FILE_NAME,
+                ZoneLayers.PRECIPITATION_ZONES_LAYER_NAME,
+                ZoneLayers.prepare_precipitation_zones_for_display,
+                (tolerance,))
+            for zoom, tolerance in ZoneLayers.DISPLAY_LEVELS.items()}
+
+    @staticmethod
+    def prepare_earthquake_zones(
+            earthquake_zones: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Prepares the earthquake zones as read from the shapefile.
+
+        Parameters
+        ----------
+        earthquake_zones : geopandas.GeoDataFrame
+            The earthquake zones as read from the shapefile
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The earthquake zones in LV95
+        """
+        return earthquake_zones.to_crs(crs=Coordinates.LV95)
+
+    @staticmethod
+    def prepare_earthquake_zones_for_display(
+            earthquake_zones: gpd.GeoDataFrame,
+            tolerance: float) -> gpd.GeoDataFrame:
+        """Prepares the earthquake zones as read from the shapefile for the
+        maps.
+
+        Parameters
+        ----------
+        earthquake_zones : geopandas.GeoDataFrame
+            The earthquake zones as read from the shapefile
+        tolerance : float
+            The simplification tolerance in meters
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The simplified earthquake zones in EPSG:4326
+        """
+        earthquake_zones = ZoneLayers.prepare_earthquake_zones(
+            earthquake_zones)
+        return ZoneLayers.simplify(
+            earthquake_zones, tolerance).to_crs(crs=Coordinates.WGS84)
+
+    @staticmethod
+    def prepare_precipitation_zones(
+            precipitation_zones: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """Prepares the precipitation zones as read from the shapefile.
+
+        Parameters
+        ----------
+        precipitation_zones : geopandas.GeoDataFrame
+            The precipitation zones as read from the shapefile
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The precipitation zones in LV95
+        """
+        precipitation_zones = precipitation_zones.to_crs(
+            crs=Coordinates.LV95)
+        # replace NaN values with '0'
+        precipitation_zones.loc[precipitation_zones['DN'].isna(), 'DN'] = 0
+        return precipitation_zones
+
+    @staticmethod
+    def prepare_precipitation_zones_for_display(
+            precipitation_zones: gpd.GeoDataFrame,
+            tolerance: float) -> gpd.GeoDataFrame:
+        """Prepares the precipitation zones as read from the shapefile for
+        the maps.
+
+        Parameters
+        ----------
+        precipitation_zones : geopandas.GeoDataFrame
+            The precipitation zones as read from the shapefile
+        tolerance : float
+            The simplification tolerance in meters
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            The simplified precipitation zones in EPSG:4326
+        """
+        precipitation_zones = ZoneLayers.prepare_precipitation_zones(
+            precipitation_zones)
+        # we have to simplify the geometry, otherwise we get a MemoryError
+        # when creating the choropleth
+        return ZoneLayers.simplify(
+            precipitation_zones, tolerance).to_crs(crs=Coordinates.WGS84)
+
+    @staticmethod
+    def simplify(zones: gpd.GeoDataFrame,
+                 tolerance: float) -> gpd.GeoDataFrame:
+        """Simplifies the zones without gaps or overlaps between them.
+
+        Parameters
+        ----------
+        zones : geopandas.GeoDataFrame
+            The zones
+        tolerance : float
+            The simplification tolerance (in the unit of the CRS of the
+            zones)
+
+        Returns
+        -------
+        geopandas.GeoDataFrame
+            A copy of the zones with the simplified geometry
+        """
+        # Neighbouring zones share their borders. coverage_simplify()
+        # simplifies every shared border only once, so that no gaps or
+        # overlaps appear between the zones. Older versions of shapely
+        # (e.g. in Pyodide) don't have it, there we simplify every zone on
+        # its own.
+        zones = zones.copy()
+        if hasattr(shapely, 'coverage_simplify'):
+            zones['geometry'] = shapely.coverage_simplify(
+                zones.geometry.values, tolerance)
+        else:
+            zones['geometry'] = zones.geometry.simplify(tolerance)
+        return zones
+
+    @staticmethod
+    def get_earthquake_zones(earthquake_zones: gpd.GeoDataFrame,
+                             points: gpd.GeoSeries) -> pd.Series:
+        """Returns the earthquake zone of every point.
+
+        All points are assigned in one spatial join (using the spatial index
+        of the zones) instead of testing every point against every zone.
+
+        Parameters
+        ----------
+        earthquake_zones : geopandas.GeoDataFrame
+            The earthquake zones in LV95
+        points : geopandas.GeoSeries
+            The points in LV95
+
+        Returns
+        -------
+        pandas.Series
+            The name of the earthquake zone of every point (with the index of
+            the points), None if a point is outside of all zones or empty
+        """
+        zones = earthquake_zones[['ZONE', 'geometry']]
+        located_points = gpd.GeoDataFrame(
+            geometry=points[~points.is_empty], crs=points.crs)
+        zone_names = ZoneLayers.__join_first(
+            located_points, zones, 'within')
+
+        # The earthquake zones don't cover bodies of water. Therefore we have
+        # some coordinates of bridges outside of any earthquake zone.
+        # Our workaround is to use the nearest earthquake zone within 1000 m
+        # (1000m should be large enough to catch all such cases). All these
+        # points are resolved in one nearest neighbour query (LV95 is
+        # metric, so the distance is in meters).
+        outside = located_points[
+            ~located_points.index.isin(zone_names.index)]
+        if not outside.empty:
+            joined = gpd.sjoin_nearest(
+                outside, zones, how='inner',
+                max_distance=ZoneLayers.MAX_EARTHQUAKE_ZONE_DISTANCE,
+                distance_col='distance')
+            # if several zones have the same distance, the first zone (in
+            # the order of the shapefile) wins
+            joined = joined.sort_values(
+                ['distance', 'index_right'], kind='stable')
+            zone_names = pd.concat([
+                zone_names, joined['ZONE'][~joined.index.duplicated()]])
+
+        zone_names = zone_names.reindex(points.index).astype(object)
+        return zone_names.where(zone_names.notna(), None)
+
+    @staticmethod
+    def get_precipitation_zones(precipitation_zones: gpd.GeoDataFrame,
+                                points: gpd.GeoSeries) -> pd.Series:
+        """Returns the precipitation zone (DN) of every point.
+
+        All points are assigned in one spatial join (using the spatial index
+        of the zones). Many support structures share the same coordinates,
+        therefore every coordinate is joined only once. If a point is within
+        several zones (overlapping zones or parts of multipart zones), the
+        zone with the highest DN value wins.
+
+        Parameters
+        ----------
+        precipitation_zones : geopandas.GeoDataFrame
+            The precipitation zones in LV95
+        points : geopandas.GeoSeries
+            The points in LV95
+
+        Returns
+        -------
+        pandas.Series
+            The DN value of the precipitation zone of every point (with the
+            index of the points), None if a point is outside of all zones or
+            empty
+        """
+        located_points = points[~points.is_empty]
+        coordinates = pd.MultiIndex.from_arrays(
+            [located_points.x, located_points.y])
+        unique_coordinates = coordinates.drop_duplicates()
+        unique_points = gpd.GeoDataFrame(
+            geometry=gpd.points_from_xy(
+                unique_coordinates.get_level_values(0),
+                unique_coordinates.get_level_values(1)),
+            crs=points.crs)
+        joined = gpd.sjoin(
+            unique_points, precipitation_zones[['DN', 'geometry']],
+            how='inner', predicate='within')
+        # the highest DN value wins
+        zone_values = joined['DN'].groupby(level=0).max().reindex(
+            range(len(unique_coordinates)))
+        zone_values.index = unique_coordinates
+
+        zone_values = pd.Series(
+            [None if pd.isna(value) else int(value)
+             for value in zone_values.reindex(coordinates)],
+            index=located_points.index, dtype=object)
+        zone_values = zone_values.reindex(points.index)
+        return zone_values.where(zone_values.notna(), None)
+
+    @staticmethod
+    def __join_first(points, zones, predicate):
+        # joins the points with the zones, if a point matches several zones,
+        # the first zone (in the order of the shapefile) wins
+        joined = gpd.sjoin(points, zones, how='inner', predicate=predicate)
+        joined = joined.sort_values('index_right', kind='stable')
+        return joined['ZONE'][~joined.index.duplicated()]
+
+
+if __name__ == '__main__':
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'data/snapshots'
+    snapshot_cache = SnapshotCache(directory)
+    ZoneLayers.read_earthquake_zones(snapshot_cache)
+    ZoneLayers.read_earthquake_zones_for_display(snapshot_cache)
+    ZoneLayers.read_precipitation_zones(snapshot_cache)
+    ZoneLayers.read_precipitation_zones_for_display(snapshot_cache)
@@ -0,0 +1,218 @@
+import geopandas as gpd
+import json
+import numpy as np
+import os
+import pandas as pd
+import shapely
+
+
+class ZoneRaster:
+    """A precomputed raster of zones for fast lookups of many points.
+
+    The raster is a grid of zone codes in LV95 with a configurable
+    resolution. It is stored as a NumPy file and memory-mapped, so looking
+    up the zones of many points is pure array indexing. Cells that touch a
+    zone boundary (or that are covered by several zones) are marked and
+    points in these cells are looked up with the exact polygon test, as are
+    all points outside of the raster or outside of all zones.
+
+    The raster is optional. It is only used if the environment variable
+    KUBA_ZONE_RASTER_RESOLUTION is set to the resolution in meters, e.g.
+    KUBA_ZONE_RASTER_RESOLUTION=100
+    """
+
+    # increase when the format of the raster changes
+    VERSION = 1
+
+    # the codes of cells that are not (fully) covered by exactly one zone
+    EXACT = -1
+
+    resolution = os.environ.get('KUBA_ZONE_RASTER_RESOLUTION')
+
+    def __init__(self, file_name: str) -> None:
+        """Initialize the ZoneRaster from a raster file.
+
+        Parameters
+        ----------
+        file_name : str
+            The name of the raster file (without extension)
+        """
+        with open(file_name + '.json') as file:
+            self.metadata = json.load(file)
+        self.codes = np.load(file_name + '.npy', mmap_mode='r')
+
+    @staticmethod
+    def get(zones: gpd.GeoDataFrame,
+            value_column: str,
+            file_name: str,
+            zones_hash: str):
+        """Returns the raster of the given zones.
+
+        The raster is only built if there is no raster file for this version
+        of the zones and the configured resolution.
+
+        Parameters
+        ----------
+        zones : geopandas.GeoDataFrame
+            The zones in LV95
+        value_column : str
+            The column with the values of the zones (e.g. 'ZONE' or 'DN')
+        file_name : str
+            The name of the raster file (without extension)
+        zones_hash : str
+            The hash of the zone shapefile
+
+        Returns
+        -------
+        ZoneRaster
+            The raster or None if no resolution is configured
+        """
+        if not ZoneRaster.resolution:
+            return None
+        resolution = float(ZoneRaster.resolution)
+        try:
+            zone_raster = ZoneRaster(file_name)
+            if zone_raster.metadata == ZoneRaster.__get_metadata(
+                    zone_raster.metadata, zones_hash, resolution):
+                return zone_raster
+        except (OSError, ValueError, KeyError):
+            # the raster doesn't exist yet or is broken
+            pass
+        ZoneRaster.build(zones, value_column, resolution, file_name,
+                         zones_hash)
+        return ZoneRaster(file_name)
+
+    @staticmethod
+    def build(zones: gpd.GeoDataFrame,
+              value_column: str,
+              resolution: float,
+              file_name: str,
+              zones_hash: str) -> None:
+        """Builds the raster of the given zones and stores it in a file.
+
+        Parameters
+        ----------
+        zones : geopandas.GeoDataFrame
+            The zones in LV95
+        value_column : str
+            The column with the values of the zones (e.g. 'ZONE' or 'DN')
+        resolution : float
+            The size of a cell in meters
+        file_name : str
+            The name of the raster file (without extension)
+        zones_hash : str
+            The hash of the zone shapefile
+        """
+        values = pd.unique(zones[value_column].dropna())
+        codes_of_zones = np.full(len(zones), ZoneRaster.EXACT, dtype='int16')
+        value_indices = pd.Index(values).get_indexer(zones[value_column])
+        codes_of_zones[value_indices >= 0] = value_indices[value_indices >= 0]
+
+        min_x, min_y, max_x, max_y = zones.total_bounds
+        columns = int(np.ceil((max_x - min_x) / resolution))
+        rows = int(np.ceil((max_y - min_y) / resolution))
+
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        temp_file_name = file_name + '.tmp.npy'
+        codes = np.lib.format.open_memmap(
+            temp_file_name, mode='w+', dtype='int16', shape=(rows, columns))
+
+        zone_tree = shapely.STRtree(zones.geometry.values)
+        boundary_tree = shapely.STRtree(zones.geometry.boundary.values)
+        left = min_x + np.arange(columns) * resolution
+        # the raster is built row by row (from north to south) to keep the
+        # memory usage low
+        for row in range(rows):
+            top = max_y - row * resolution
+            cells = shapely.box(left, top - resolution,
+                                left + resolution, top)
+            row_codes = np.full(columns, ZoneRaster.EXACT, dtype='int16')
+
+            # cells without boundary are completely within one zone or
+            # outside of all zones, their center tells which one
+            centers = shapely.points(
+                left + resolution / 2, top - resolution / 2)
+            cell_indices, zone_indices = zone_tree.query(
+                centers, predicate='within')
+            row_codes[cell_indices] = codes_of_zones[zone_indices]
+            # cells covered by several zones are looked up exactly
+            cell_counts = np.bincount(cell_indices, minlength=columns)
+            row_codes[cell_counts > 1] = ZoneRaster.EXACT
+
+            boundary_cells, _ = boundary_tree.query(
+                cells, predicate='intersects')
+            row_codes[boundary_cells] = ZoneRaster.EXACT
+            codes[row] = row_codes
+
+        codes.flush()
+        del codes
+        os.replace(temp_file_name, file_name + '.npy')
+
+        metadata = ZoneRaster.__get_metadata(
+            {'origin': [float(min_x), float(max_y)],
+             'values': [ZoneRaster.__to_json_value(value)
+                        for value in values]},
+            zones_hash, resolution)
+        with open(file_name + '.json.tmp', 'w') as file:
+            json.dump(metadata, file)
+        os.replace(file_name + '.json.tmp', file_name + '.json')
+
+    def lookup(self, points: gpd.GeoSeries, calculate) -> pd.Series:
+        """Returns the zones of the given points.
+
+        Parameters
+        ----------
+        points : geopandas.GeoSeries
+            The points in LV95
+        calculate : function
+            A function that calculates the zones of a GeoSeries of points
+            with the exact polygon test (used for all points in cells that
+            touch a zone boundary or are outside of all zones)
+
+        Returns
+        -------
+        pandas.Series
+            The zone of every point (with the index of the points), None for
+            empty points or points outside of all zones
+        """
+        zone_values = pd.Series(None, index=points.index, dtype=object)
+        located_points = points[~points.is_empty]
+        origin_x, origin_y = self.metadata['origin']
+        resolution = self.metadata['resolution']
+        rows, columns = self.codes.shape
+
+        column_indices = np.floor(
+            (located_points.x.to_numpy() - origin_x) / resolution)
+        row_indices = np.floor(
+            (origin_y - located_points.y.to_numpy()) / resolution)
+        inside = ((column_indices >= 0) & (column_indices < columns) &
+                  (row_indices >= 0) & (row_indices < rows))
+        codes = np.full(len(located_points), ZoneRaster.EXACT, dtype='int16')
+        codes[inside] = self.codes[row_indices[inside].astype('int64'),
+                                   column_indices[inside].astype('int64')]
+
+        values = np.array(self.metadata['values'], dtype=object)
+        exact = codes == ZoneRaster.EXACT
+        zone_values.loc[located_points.index[~exact]] = values[codes[~exact]]
+        if exact.any():
+            exact_points = located_points[exact]
+            zone_values.loc[exact_points.index] = calculate(exact_points)
+        return zone_values
+
+    @staticmethod
+    def __get_metadata(metadata, zones_hash, resolution):
+        return {**metadata,
+                'version': ZoneRaster.VERSION,
+                'zones_hash': zones_hash,
+                'resolution': resolution}
+
+    @staticmethod
+    def __to_json_value(value):
+        # integral numbers (like the DN values of the precipitation zones)
+        # are returned as int
+        if (isinstance(value, (float, np.floating)) and
+                float(value).is_integer()):
+            return int(value)
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
@@ -0,0 +1,215 @@
+import geopandas as gpd
+import json
+import math
+import numpy as np
+import os
+import shapely
+import shutil
+import sys
+from matplotlib.collections import PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path
+from Coordinates import Coordinates
+from SnapshotCache import SnapshotCache
+from ZoneLayers import ZoneLayers
+
+
+class ZoneTiles:
+    """Cuts the zone layers into map tiles.
+
+    Sending the zones as one GeoJSON layer to the browser gets expensive
+    with detailed zones. Instead, the zones can be rendered once into PNG
+    tiles (in the usual {z}/{x}/{y} layout of web maps) that are stored in a
+    static tile directory. The maps then only load the tiles that are
+    visible. Every zoom level is rendered from zones that are simplified to
+    the size of a pixel.
+
+    The tiles are built in advance with the following command (the deploy
+    workflow does this before building the JupyterLite site):
+
+        python ZoneTiles.py [snapshot directory]
+
+    If there are no tiles (or the zone shapefiles changed since the tiles
+    were built), the maps show the zones as choropleths.
+    """
+
+    # increase when the format of the tiles changes
+    VERSION = 1
+
+    EARTHQUAKE_ZONES_DIRECTORY = 'data/tiles/earthquake_zones'
+    PRECIPITATION_ZONES_DIRECTORY = 'data/tiles/precipitation_zones'
+
+    TILE_SIZE = 256
+    MIN_ZOOM = 6
+    # the map shows scaled tiles of this zoom level when zooming in further
+    MAX_ZOOM = 12
+
+    # the style of the choropleths
+    FILL_OPACITY = 0.5
+    BORDER_WIDTH = 0.9
+    BORDER_DASHES = (5, 5)
+
+    WEB_MERCATOR = 'EPSG:3857'
+    # half of the circumference of the earth in Web Mercator
+    EXTENT = 20037508.342789244
+
+    @staticmethod
+    def get_metadata(directory: str, zones_hash: str) -> dict:
+        """Returns the metadata of the tiles in a directory.
+
+        Parameters
+        ----------
+        directory : str
+            The tile directory
+        zones_hash : str
+            The hash of the zone shapefile
+
+        Returns
+        -------
+        dict
+            The metadata of the tiles or None if there are no tiles of this
+            version of the zones
+        """
+        try:
+            with open(os.path.join(directory, 'tiles.json')) as file:
+                metadata = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if (metadata.get('version') != ZoneTiles.VERSION or
+                metadata.get('zones_hash') != zones_hash):
+            return None
+        return metadata
+
+    @staticmethod
+    def build(zones: gpd.GeoDataFrame,
+              colors: list,
+              directory: str,
+              zones_hash: str) -> None:
+        """Renders the tiles of the given zones into a directory.
+
+        Parameters
+        ----------
+        zones : geopandas.GeoDataFrame
+            The zones in LV95
+        colors : list
+            The fill color of every zone
+        directory : str
+            The tile directory
+        zones_hash : str
+            The hash of the zone shapefile
+        """
+        # the tiles are built in a temporary directory, so that a map never
+        # sees a half-built set of tiles
+        temp_directory = directory + '.tmp'
+        shutil.rmtree(temp_directory, ignore_errors=True)
+
+        figure = Figure(figsize=(ZoneTiles.TILE_SIZE / 72,
+                                 ZoneTiles.TILE_SIZE / 72), dpi=72)
+        axes = figure.add_axes((0, 0, 1, 1))
+        axes.set_axis_off()
+
+        for zoom in range(ZoneTiles.MIN_ZOOM, ZoneTiles.MAX_ZOOM + 1):
+            tile_size = 2 * ZoneTiles.EXTENT / 2 ** zoom
+            # the zones are simplified to the size of a pixel (in LV95,
+            # which is close enough to the scale of Web Mercator in
+            # Switzerland)
+            zoom_zones = ZoneLayers.simplify(
+                zones, tile_size / ZoneTiles.TILE_SIZE * math.cos(
+                    math.radians(46.8))).to_crs(ZoneTiles.WEB_MERCATOR)
+            geometries = zoom_zones.geometry.values
+            paths = [ZoneTiles.__to_path(geometry) for geometry in geometries]
+            zone_tree = shapely.STRtree(geometries)
+
+            min_x, min_y, max_x, max_y = zoom_zones.total_bounds
+            columns = range(
+                math.floor((min_x + ZoneTiles.EXTENT) / tile_size),
+                math.floor((max_x + ZoneTiles.EXTENT) / tile_size) + 1)
+            rows = range(
+                math.floor((ZoneTiles.EXTENT - max_y) / tile_size),
+                math.floor((ZoneTiles.EXTENT - min_y) / tile_size) + 1)
+            for column in columns:
+                left = column * tile_size - ZoneTiles.EXTENT
+                column_directory = os.path.join(
+                    temp_directory, str(zoom), str(column))
+                os.makedirs(column_directory, exist_ok=True)
+                for row in rows:
+                    top = ZoneTiles.EXTENT - row * tile_size
+                    zone_indices = zone_tree.query(shapely.box(
+                        left, top - tile_size, left + tile_size, top))
+                    if len(zone_indices) == 0:
+                        # the map shows nothing for missing tiles
+                        continue
+                    zone_indices = np.sort(zone_indices)
+                    collection = PathCollection(
+                        [paths[i] for i in zone_indices],
+                        facecolors=[colors[i] for i in zone_indices],
+                        edgecolors='black',
+                        linewidths=ZoneTiles.BORDER_WIDTH,
+                        linestyles=[(0, ZoneTiles.BORDER_DASHES)])
+                    # the fill is transparent, the borders are not
+                    collection.set_facecolor(
+                        [(*color[:3], ZoneTiles.FILL_OPACITY)
+                         for color in collection.get_facecolor()])
+                    axes.add_collection(collection)
+                    axes.set_xlim(left, left + tile_size)
+                    axes.set_ylim(top - tile_size, top)
+                    figure.savefig(
+                        os.path.join(column_directory, str(row) + '.png'),
+                        transparent=True)
+                    collection.remove()
+
+        west, south, east, north = zones.to_crs(
+            Coordinates.WGS84).total_bounds
+        metadata = {'version': ZoneTiles.VERSION,
+                    'zones_hash': zones_hash,
+                    'min_zoom': ZoneTiles.MIN_ZOOM,
+                    'max_zoom': ZoneTiles.MAX_ZOOM,
+                    'bounds': [[float(south), float(west)],
+                               [float(north), float(east)]]}
+        with open(os.path.join(temp_directory, 'tiles.json'), 'w') as file:
+            json.dump(metadata, file)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(temp_directory, directory)
+
+    @staticmethod
+    def __to_path(geometry):
+        # one compound path with all rings of all polygons, so that holes
+        # are left empty
+        vertices = []
+        codes = []
+        for polygon in shapely.get_parts(geometry):
+            if not isinstance(polygon, shapely.Polygon):
+                continue
+            for ring in shapely.get_rings(polygon):
+                ring_vertices = shapely.get_coordinates(ring)
+                ring_codes = np.full(len(ring_vertices), Path.LINETO)
+                ring_codes[0] = Path.MOVETO
+                ring_codes[-1] = Path.CLOSEPOLY
+                vertices.append(ring_vertices)
+                codes.append(ring_codes)
+        if not vertices:
+            return Path(np.empty((0, 2)))
+        return Path(np.concatenate(vertices), np.concatenate(codes))
+
+
+if __name__ == '__main__':
+    # the colors are the colors of the choropleths
+    from InteractiveMap import InteractiveMap
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else 'data/snapshots'
+    snapshot_cache = SnapshotCache(directory)
+
+    earthquake_zones = ZoneLayers.read_earthquake_zones(snapshot_cache)
+    ZoneTiles.build(
+        earthquake_zones,
+        InteractiveMap.get_earthquake_zone_colors(earthquake_zones),
+        ZoneTiles.EARTHQUAKE_ZONES_DIRECTORY,
+        snapshot_cache.get_file_hash(ZoneLayers.EARTHQUAKE_ZONES_FILE_NAME))
+
+    precipitation_zones = ZoneLayers.read_precipitation_zones(snapshot_cache)
+    ZoneTiles.build(
+        precipitation_zones,
+        InteractiveMap.get_precipitation_zone_colors(precipitation_zones),
+        ZoneTiles.PRECIPITATION_ZONES_DIRECTORY,
+        snapshot_cache.get_file_hash(
+            ZoneLayers.PRECIPITATION_ZONES_FILE_NAME))